@@ -0,0 +1,134 @@
+import sys
+
+import numpy as np
+from scipy import sparse
+
+import degrees
+from graph import CompactGraph
+
+# Number of collaborators listed per person when none is given
+TOP = 5
+
+
+class Collaborations():
+    """
+    Who-worked-with-whom statistics for every person at once.
+
+    The stars table is held as a sparse people x movies incidence matrix
+    B, so B @ B.T counts the movies every pair of people share. With the
+    diagonal dropped, the nonzeros of a row are the person's unique
+    co-stars and their values the number of movies made together.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+        people = len(graph.person_ids)
+        movies = len(graph.movie_ids)
+        person_movies = np.frombuffer(graph.person_movies, dtype=np.intc)
+        self.incidence = sparse.csr_matrix(
+            (np.ones(len(person_movies), dtype=np.int32), person_movies,
+             np.frombuffer(graph.person_offsets, dtype=np.intc)),
+            shape=(people, movies)
+        )
+        shared = (self.incidence @ self.incidence.T).tocsr()
+        shared = (shared - sparse.diags(shared.diagonal(), dtype=shared.dtype)).tocsr()
+        shared.eliminate_zeros()
+        shared.sort_indices()
+        self.shared = shared
+
+    @classmethod
+    def from_degrees(cls):
+        """
+        Builds the statistics of the data loaded by degrees.load_data.
+        """
+        if degrees.graph is not None:
+            return cls(degrees.graph)
+        return cls(CompactGraph.from_data(degrees.people, degrees.movies))
+
+    def unique_costars(self):
+        """
+        Returns an array with the number of unique co-stars of every person index.
+        """
+        return np.diff(self.shared.indptr)
+
+    def most_collaborative(self, count=1):
+        """
+        Returns the person_ids of the count people with the most unique
+        co-stars, most first, as (person_id, co-stars) pairs.
+        """
+        counts = self.unique_costars()
+        count = min(count, len(counts))
+        if count == 0:
+            return []
+        best = np.argpartition(-counts, count - 1)[:count]
+        best = best[np.lexsort((best, -counts[best]))]
+        return [(self.graph.person_ids[person], int(counts[person])) for person in best]
+
+    def top_collaborators(self, k=TOP):
+        """
+        Returns the k people every person shared the most movies with,
+        for all people at once, in CSR form: the collaborators of person
+        index i are collaborators[offsets[i]:offsets[i + 1]], with the
+        number of shared movies at the same positions in counts.
+        """
+        shared = self.shared
+        rows = np.repeat(np.arange(shared.shape[0]), np.diff(shared.indptr))
+
+        # order every row by shared movies, most first, then by person index
+        order = np.lexsort((shared.indices, -shared.data, rows))
+        rank = np.arange(len(order)) - shared.indptr[rows[order]]
+        keep = order[rank < k]
+
+        offsets = np.zeros(shared.shape[0] + 1, dtype=np.int64)
+        np.cumsum(np.minimum(np.diff(shared.indptr), k), out=offsets[1:])
+        return offsets, shared.indices[keep], shared.data[keep]
+
+    def collaborators(self, person_id, k=TOP):
+        """
+        Returns up to k (person_id, shared movies) pairs for the people
+        person_id made the most movies with.
+        """
+        row = self.shared[self.graph.person_index[person_id]]
+        best = np.lexsort((row.indices, -row.data))[:k]
+        return [(self.graph.person_ids[person], int(count)) for person, count in zip(row.indices[best], row.data[best])]
+
+    def common_movies(self, person_id1, person_id2):
+        """
+        Returns the set of movie_ids both people starred in.
+        """
+        index = self.graph.person_index
+        movies = np.intersect1d(
+            self.incidence[index[person_id1]].indices,
+            self.incidence[index[person_id2]].indices,
+            assume_unique=True
+        )
+        return {self.graph.movie_ids[movie] for movie in movies}
+
+    def common_movie_counts(self, person_id):
+        """
+        Returns a dictionary mapping every co-star of person_id
+        to the number of movies they share.
+        """
+        row = self.shared[self.graph.person_index[person_id]]
+        return {self.graph.person_ids[person]: int(count) for person, count in zip(row.indices, row.data)}
+
+
+def main():
+    if len(sys.argv) not in (2, 3):
+        sys.exit("Usage: python analytics.py directory [count]")
+    directory = sys.argv[1]
+    count = int(sys.argv[2]) if len(sys.argv) == 3 else TOP
+
+    degrees.load_data(directory, compact=True, snapshot=True)
+    collaborations = Collaborations.from_degrees()
+    for person_id, costars in collaborations.most_collaborative(count):
+        name = degrees.people[person_id]["name"]
+        top = ", ".join(
+            f"{degrees.people[other]['name']} ({shared})"
+            for other, shared in collaborations.collaborators(person_id)
+        )
+        print(f"{name}: {costars} co-stars, most often with {top}")
+
+
+if __name__ == "__main__":
+    main()
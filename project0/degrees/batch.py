@@ -0,0 +1,168 @@
+import csv
+import json
+import sys
+from array import array
+from multiprocessing import Pool
+from multiprocessing.shared_memory import SharedMemory
+
+import degrees
+from graph import CompactGraph
+
+# Number of queries sent to a worker at a time
+CHUNK_SIZE = 64
+
+# Arrays of a CompactGraph, in the order they are laid out in shared memory
+ARRAYS = ("person_offsets", "person_movies", "movie_offsets", "movie_people", "components")
+
+# Shared memory block and graph attached by every worker in init_worker
+_memory = None
+_graph = None
+
+
+def share_graph(graph):
+    """
+    Copies the CSR and component arrays of graph into a new shared memory block.
+
+    Returns the SharedMemory, which the caller must close and unlink,
+    and the layout workers need to attach to it with attach_graph.
+    """
+    itemsize = array("i").itemsize
+    sizes = [len(getattr(graph, name)) for name in ARRAYS]
+    memory = SharedMemory(create=True, size=max(1, sum(sizes)) * itemsize)
+
+    view = memory.buf.cast("i")
+    start = 0
+    for name, size in zip(ARRAYS, sizes):
+        view[start:start + size] = array("i", getattr(graph, name))
+        start += size
+    view.release()
+
+    return memory, (memory.name, len(graph.person_ids), len(graph.movie_ids), sizes)
+
+
+def attach_graph(layout):
+    """
+    Attaches to a graph shared by share_graph.
+
+    Returns the SharedMemory and a CompactGraph whose arrays are views
+    over it. Its person and movie ids are just the indexes themselves.
+    """
+    name, people_count, movies_count, sizes = layout
+    memory = SharedMemory(name=name)
+    view = memory.buf.cast("i")
+    arrays = []
+    start = 0
+    for size in sizes:
+        arrays.append(view[start:start + size])
+        start += size
+    return memory, CompactGraph(range(people_count), range(movies_count), *arrays)
+
+
+def resolve(person):
+    """
+    Returns the person_id for an id or an unambiguous name, or None.
+    """
+    if person in degrees.people:
+        return person
+    person_ids = degrees.names.get(person.lower(), set())
+    if len(person_ids) == 1:
+        return next(iter(person_ids))
+    return None
+
+
+def batch_paths(pairs, workers=None):
+    """
+    Answers every (source, target) pair of people, given by id or name,
+    against the data already loaded by degrees.load_data(compact=True).
+
+    The graph is placed in shared memory and the searches fan out over
+    a pool of processes. Yields one result dictionary per pair, in order.
+    """
+    graph = degrees.graph
+    memory, layout = share_graph(graph)
+    try:
+        with Pool(workers, initializer=init_worker, initargs=(layout,)) as pool:
+            queries = (make_query(graph, source, target) for source, target in pairs)
+            for query, path in pool.imap(solve_query, queries, CHUNK_SIZE):
+                yield query_result(graph, query, path)
+    finally:
+        memory.close()
+        memory.unlink()
+
+
+def make_query(graph, source, target):
+    """
+    Returns (source, target, source index, target index), with None
+    in place of the index of a person that cannot be resolved.
+    """
+    source_id = resolve(source)
+    target_id = resolve(target)
+    return (
+        source,
+        target,
+        None if source_id is None else graph.person_index[source_id],
+        None if target_id is None else graph.person_index[target_id]
+    )
+
+
+def init_worker(layout):
+    """
+    Attaches a pool worker to the graph shared by share_graph.
+    """
+    global _memory, _graph
+    _memory, _graph = attach_graph(layout)
+
+
+def solve_query(query):
+    """
+    Runs a bidirectional search for one query in a worker.
+    """
+    source, target = query[2], query[3]
+    if source is None or target is None:
+        return query, None
+    if _graph.components[source] != _graph.components[target]:
+        return query, None
+    return query, degrees.bidirectional_path(source, target, _graph.neighbors)
+
+
+def query_result(graph, query, path):
+    """
+    Returns the JSON serializable answer to a query.
+    """
+    source, target, source_index, target_index = query
+    result = {"source": source, "target": target}
+    if source_index is None or target_index is None:
+        result["error"] = "Person not found or ambiguous."
+    elif path is None:
+        result["degrees"] = None
+        result["path"] = None
+    else:
+        result["degrees"] = len(path)
+        result["path"] = graph.path_ids(path)
+    return result
+
+
+def read_pairs(f):
+    """
+    Yields (source, target) pairs from tab separated lines of names or ids.
+    """
+    for row in csv.reader(f, delimiter="\t"):
+        if len(row) >= 2:
+            yield row[0], row[1]
+
+
+def main():
+    if len(sys.argv) not in (3, 4):
+        sys.exit("Usage: python batch.py directory pairs.tsv [workers]")
+    directory = sys.argv[1]
+    workers = int(sys.argv[3]) if len(sys.argv) == 4 else None
+
+    # Load data once, then stream the answers as JSON lines
+    degrees.load_data(directory, compact=True, snapshot=True)
+    with (sys.stdin if sys.argv[2] == "-" else open(sys.argv[2], encoding="utf-8")) as f:
+        for result in batch_paths(read_pairs(f), workers):
+            print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
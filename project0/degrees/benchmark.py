@@ -0,0 +1,124 @@
+import multiprocessing
+import os
+import random
+import resource
+import statistics
+import sys
+import time
+
+import degrees
+
+# Number of random pairs timed per configuration when none is given
+QUERIES = 200
+
+# Ways of loading the data and searching it, as (load_data, shortest_path) keyword arguments
+CONFIGS = {
+    "dict": ({}, {}),
+    "dict-bidirectional": ({}, {"bidirectional": True}),
+    "compact": ({"compact": True}, {"bidirectional": True}),
+    "snapshot": ({"compact": True, "snapshot": True}, {"bidirectional": True}),
+    "costars": ({"compact": True, "costars": True}, {"bidirectional": True}),
+    "sqlite": ({"database": True}, {}),
+}
+
+
+def benchmark(directory, config, queries=QUERIES, seed=0):
+    """
+    Loads directory and times queries random shortest_path searches
+    with the load_data and shortest_path arguments of a CONFIGS entry.
+
+    Returns a dictionary with the load time in seconds, the peak RSS
+    in MiB and the search latency percentiles in milliseconds.
+    """
+    load_arguments, search_arguments = CONFIGS[config]
+
+    start = time.perf_counter()
+    degrees.load_data(directory, **load_arguments)
+    load_time = time.perf_counter() - start
+
+    # time the searches themselves rather than the path cache
+    degrees.cache = None
+    rng = random.Random(seed)
+    person_ids = sorted(degrees.people)
+    latencies = []
+    connected = 0
+    for _ in range(queries):
+        source, target = rng.choice(person_ids), rng.choice(person_ids)
+        start = time.perf_counter()
+        path = degrees.shortest_path(source, target, **search_arguments)
+        latencies.append((time.perf_counter() - start) * 1000)
+        connected += path is not None
+
+    result = {
+        "config": config,
+        "people": len(degrees.people),
+        "movies": len(degrees.movies),
+        "load": load_time,
+        "rss": peak_rss(),
+        "connected": connected,
+    }
+    result.update(percentiles(latencies))
+    return result
+
+
+def percentiles(latencies):
+    """
+    Returns the mean, p50, p90, p99 and max of a list of latencies.
+    """
+    if len(latencies) < 2:
+        latencies = latencies * 2 or [0.0, 0.0]
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "mean": statistics.fmean(latencies),
+        "p50": cuts[49],
+        "p90": cuts[89],
+        "p99": cuts[98],
+        "max": max(latencies),
+    }
+
+
+def peak_rss():
+    """
+    Returns the peak resident set size of this process in MiB.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run(directory, config, queries, seed):
+    """
+    Runs benchmark in a fresh process so that every configuration
+    starts from an empty heap and reports its own peak RSS.
+    """
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(1) as pool:
+        return pool.apply(benchmark, (directory, config, queries, seed))
+
+
+def main():
+    if len(sys.argv) not in (2, 3, 4):
+        sys.exit(f"Usage: python benchmark.py directory [queries] [{' | '.join(CONFIGS)}]")
+    directory = sys.argv[1]
+    queries = int(sys.argv[2]) if len(sys.argv) >= 3 else QUERIES
+    configs = [sys.argv[3]] if len(sys.argv) == 4 else list(CONFIGS)
+
+    # the snapshot and sqlite configurations measure loading files that already exist
+    for config, filename in (("snapshot", "degrees.snapshot"), ("sqlite", "degrees.sqlite")):
+        if config in configs:
+            if os.path.exists(os.path.join(directory, filename)):
+                os.remove(os.path.join(directory, filename))
+            run(directory, config, 0, 0)
+
+    print(f"{'config':<20}{'load s':>9}{'rss MiB':>10}{'mean ms':>10}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for config in configs:
+        result = run(directory, config, queries, 0)
+        print(
+            f"{config:<20}{result['load']:>9.2f}{result['rss']:>10.1f}{result['mean']:>10.2f}"
+            f"{result['p50']:>10.2f}{result['p90']:>10.2f}{result['p99']:>10.2f}{result['max']:>10.2f}"
+        )
+    print(f"{result['people']} people, {result['movies']} movies, {result['connected']} of {queries} pairs connected")
+
+
+if __name__ == "__main__":
+    main()
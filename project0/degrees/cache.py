@@ -0,0 +1,96 @@
+from collections import OrderedDict
+
+# Number of paths kept by a PathCache when no size is given
+CACHE_SIZE = 4096
+
+# Stored in place of a path for pairs that are not connected
+NOT_CONNECTED = "not connected"
+
+
+class PathCache():
+    """
+    LRU cache of shortest paths keyed by (source, target).
+
+    A path cached for (a, b) also answers (b, a) by reversing it. The
+    cache belongs to one version of the data: calling it with a
+    different version drops every entry first.
+    """
+
+    def __init__(self, maxsize=CACHE_SIZE):
+        self.maxsize = maxsize
+        self.version = None
+        self.paths = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, source, target, version):
+        """
+        Returns (found, path) for a pair of people. path is None when
+        they are known not to be connected and found is False on a miss.
+        """
+        self._check(version)
+        if (source, target) in self.paths:
+            self.paths.move_to_end((source, target))
+            self.hits += 1
+            return True, _unpack(self.paths[source, target])
+        if (target, source) in self.paths:
+            self.paths.move_to_end((target, source))
+            self.hits += 1
+            path = _unpack(self.paths[target, source])
+            return True, None if path is None else reverse_path(path, target)
+        self.misses += 1
+        return False, None
+
+    def put(self, source, target, path, version):
+        """
+        Stores the path (or None) found between two people.
+        """
+        self._check(version)
+        self.paths[source, target] = NOT_CONNECTED if path is None else tuple(path)
+        self.paths.move_to_end((source, target))
+        while len(self.paths) > self.maxsize:
+            self.paths.popitem(last=False)
+            self.evictions += 1
+
+    def retain(self, keep, version):
+        """
+        Drops every entry for which keep(source, target, path) is False,
+        for changes to the data that only affect some of the paths.
+        """
+        self._check(version)
+        for (source, target), entry in list(self.paths.items()):
+            if not keep(source, target, _unpack(entry)):
+                del self.paths[source, target]
+
+    def clear(self):
+        self.paths.clear()
+
+    def stats(self):
+        """
+        Returns the hit, miss and eviction counters and the current size.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self.paths)
+        }
+
+    def _check(self, version):
+        if version != self.version:
+            self.paths.clear()
+            self.version = version
+
+
+def reverse_path(path, source):
+    """
+    Returns the (movie_id, person_id) path from the last person of path
+    back to source, the person path started from.
+    """
+    people = [source] + [person_id for _, person_id in path[:-1]]
+    return [(movie_id, person_id) for (movie_id, _), person_id in zip(reversed(path), reversed(people))]
+
+
+def _unpack(entry):
+    return None if entry == NOT_CONNECTED else list(entry)
@@ -0,0 +1,71 @@
+from collections.abc import Mapping
+
+
+class ColumnView(Mapping):
+    """
+    Read only id -> {field: value} view over one list per field,
+    indexed like the ids of a CompactGraph.
+
+    Compact data keeps the names, births, titles and years of people
+    and movies this way, as snapshot.COLUMNS does, instead of holding
+    a dictionary per entry. Entries are built when they are looked up.
+    """
+
+    def __init__(self, ids, index, columns):
+        self.ids = ids
+        self.index = index
+        self.columns = columns
+
+    @classmethod
+    def from_rows(cls, rows, fields):
+        """
+        Collects rows of an id followed by one value per field. A repeated
+        id keeps its first position and takes the values of its last row.
+        """
+        ids = []
+        index = {}
+        columns = {field: [] for field in fields}
+        lists = list(columns.values())
+        for row_id, *values in rows:
+            position = index.get(row_id)
+            if position is None:
+                index[row_id] = len(ids)
+                ids.append(row_id)
+                for column, value in zip(lists, values):
+                    column.append(value)
+            else:
+                for column, value in zip(lists, values):
+                    column[position] = value
+        return cls(ids, index, columns)
+
+    def __getitem__(self, key):
+        position = self.index[key]
+        return {field: column[position] for field, column in self.columns.items()}
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def remapped(self, ids, index, added):
+        """
+        Returns a view over new ids, such as those of a CompactGraph
+        with a delta applied. Each id takes its values from added, a
+        dictionary of id -> tuple of values in field order, if it is
+        there and from this view otherwise.
+        """
+        columns = {field: [] for field in self.columns}
+        old = list(self.columns.values())
+        new = list(columns.values())
+        for row_id in ids:
+            values = added.get(row_id)
+            if values is None:
+                position = self.index[row_id]
+                values = [column[position] for column in old]
+            for column, value in zip(new, values):
+                column.append(value)
+        return ColumnView(ids, index, columns)
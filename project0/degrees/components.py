@@ -0,0 +1,153 @@
+from array import array
+from collections import deque
+
+
+def component_labels(graph):
+    """
+    Returns an array with the connected component of
+    every person index of a CompactGraph.
+    """
+    return label_components(
+        len(graph.person_ids),
+        (graph.stars_for(movie) for movie in range(len(graph.movie_ids)))
+    )
+
+
+def component_ids(people, movies):
+    """
+    Returns a dictionary mapping every person_id in the people and
+    movies dictionaries of degrees to its connected component.
+    """
+    person_ids = list(people)
+    index = {person_id: i for i, person_id in enumerate(person_ids)}
+    labels = label_components(
+        len(person_ids),
+        ([index[person_id] for person_id in movie["stars"]] for movie in movies.values())
+    )
+    return dict(zip(person_ids, labels))
+
+
+def label_components(count, groups):
+    """
+    Joins the members of every group (a movie's cast of person indexes)
+    with union-find.
+
+    Returns an array of length count holding a component number per
+    person, numbered densely in order of each component's first person.
+    """
+    parents = array("i", range(count))
+
+    for group in groups:
+        first = None
+        for member in group:
+            root = _find(parents, member)
+            if first is None:
+                first = root
+            elif root != first:
+                parents[root] = first
+
+    labels = array("i", [-1]) * count
+    roots = {}
+    for person in range(count):
+        labels[person] = roots.setdefault(_find(parents, person), len(roots))
+    return labels
+
+
+def _find(parents, person):
+    """
+    Returns the root of person, halving the path on the way.
+    """
+    while parents[person] != person:
+        parents[person] = parents[parents[person]]
+        person = parents[person]
+    return person
+
+
+class PersonComponents():
+    """
+    Exposes people[person_id]["component"] of the degrees
+    people dictionary as a person_id -> component mapping.
+    """
+
+    def __init__(self, people):
+        self.people = people
+
+    def __getitem__(self, person_id):
+        return self.people[person_id]["component"]
+
+    def __setitem__(self, person_id, component):
+        self.people[person_id]["component"] = component
+
+
+def split_group(group, neighbors, labels, next_label):
+    """
+    Relabels components after connections were removed.
+
+    group lists every person who lost a connection together with someone
+    they were connected to through it. Each of them is checked against one
+    representative per piece found so far, and the smaller side of any
+    component that fell apart gets a new label, starting at next_label.
+    Returns the next unused label.
+    """
+    pieces = []
+    for person in dict.fromkeys(group):
+        for piece in pieces:
+            if labels[piece] != labels[person]:
+                continue
+            reached = _race(piece, person, neighbors, labels, labels[piece], labels[person])
+            if reached is None:
+                break
+            for member in reached:
+                labels[member] = next_label
+            next_label += 1
+        else:
+            pieces.append(person)
+    return next_label
+
+
+def merge_group(group, neighbors, labels):
+    """
+    Relabels components after connections were added.
+
+    group lists people that are now connected to each other, such as the
+    cast of a movie that gained stars. The smaller of any two components
+    being joined takes the label of the larger one.
+    """
+    first = group[0]
+    for person in group[1:]:
+        if labels[person] == labels[first]:
+            continue
+        label_first = labels[first]
+        label_person = labels[person]
+        piece = _race(first, person, neighbors, labels, label_first, label_person)
+        label = label_person if first in piece else label_first
+        for member in piece:
+            labels[member] = label
+
+
+def _race(a, b, neighbors, labels, label_a, label_b):
+    """
+    Breadth first searches from a, through people labelled label_a, and
+    from b, through people labelled label_b, one person at a time each.
+
+    Returns None if the searches meet, or else the set of people reached
+    by the side that ran out of people first.
+    """
+    if a == b:
+        return None
+    seen = ({a}, {b})
+    queues = (deque([a]), deque([b]))
+    side_labels = (label_a, label_b)
+    while True:
+        for side in (0, 1):
+            if not queues[side]:
+                return seen[side]
+            person = queues[side].popleft()
+            for _, neighbor in neighbors(person):
+                if neighbor in seen[side] or labels[neighbor] != side_labels[side]:
+                    continue
+                if neighbor in seen[1 - side]:
+                    return None
+                seen[side].add(neighbor)
+                queues[side].append(neighbor)
+
@@ -0,0 +1,53 @@
+from array import array
+
+
+class CostarGraph():
+    """
+    Person -> person projection of a CompactGraph.
+
+    The co-stars of person i are costars[offsets[i]:offsets[i + 1]],
+    each listed once with one witness movie they starred in together
+    at the same position in witnesses. Searching it skips scanning
+    every cast of every movie of a person and the repeated co-stars
+    of people who often work together.
+    """
+
+    def __init__(self, graph, offsets, costars, witnesses):
+        self.graph = graph
+        self.offsets = offsets
+        self.costars = costars
+        self.witnesses = witnesses
+
+    @classmethod
+    def build(cls, graph):
+        """
+        Projects graph, keeping the first movie found for every
+        pair of people as their witness.
+        """
+        # one person can have more co-stars than there are credits, so offsets are 64 bit
+        offsets = array("q", [0])
+        costars = array("i")
+        witnesses = array("i")
+
+        # seen[other] == person once other has been listed as a co-star of person
+        seen = array("i", [-1]) * len(graph.person_ids)
+        for person in range(len(graph.person_ids)):
+            seen[person] = person
+            for movie in graph.movies_for(person):
+                for other in graph.stars_for(movie):
+                    if seen[other] != person:
+                        seen[other] = person
+                        costars.append(other)
+                        witnesses.append(movie)
+            offsets.append(len(costars))
+        return cls(graph, offsets, costars, witnesses)
+
+    def neighbors(self, person):
+        """
+        Returns (movie, person) index pairs for every co-star of the
+        person at index person, with the witness movie of each.
+        """
+        start = self.offsets[person]
+        end = self.offsets[person + 1]
+        return zip(self.witnesses[start:end], self.costars[start:end])
+
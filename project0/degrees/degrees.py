@@ -1,65 +1,550 @@
 import csv
 import sys
-
-from util import Node, StackFrontier, QueueFrontier
+from array import array
+from collections import deque
+from functools import partial
+
+from cache import PathCache
+from columns import ColumnView
+from components import component_ids, component_labels
+from costars import CostarGraph
+from graph import CompactGraph
+from ingest import read_parallel
+from landmarks import LANDMARKS, Landmarks
+from name_index import NameIndex
+from snapshot import read_snapshot, write_snapshot
+from stats import SearchStats, phase
+from store import SqliteStore
 
 # Maps names to a set of corresponding person_ids
 names = {}
 
-# Maps person_ids to a dictionary of: name, birth, movies (a set of movie_ids)
+# NameIndex over the keys of names for prefix and fuzzy lookups,
+# built by index_names the first time one is needed, or the names
+# view of the store, which searches them in SQL
+name_index = None
+
+# Maps release years (as ints) to the set of movie_ids released that year
+movies_by_year = {}
+
+# Maps person_ids to a dictionary of: name, birth, movies (a set of movie_ids),
+# component (the connected component the person belongs to)
 people = {}
 
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# CompactGraph holding the adjacency and components when loaded with
+# compact=True, in which case people and movies are ColumnViews over
+# lists indexed like the graph, with no movies/stars sets
+graph = None
+
+# SqliteStore when loaded with database set, in which case people, movies
+# and names are read only views of it rather than dictionaries
+store = None
+
+# CostarGraph projection of the data when loaded with costars=True, else None
+costar_graph = None
+
+# Number of component labels in use, the next new component gets this label
+component_count = 0
+
+# Bumped every time data is loaded, so cached paths of older data are dropped
+data_version = 0
 
-def load_data(directory):
+# LRU cache of shortest_path results, None to disable it
+cache = PathCache()
+
+# Called with the SearchStats of every shortest_path call when set
+stats_hook = None
+
+
+def load_data(directory, compact=False, snapshot=False, parallel=False, costars=False, database=None):
     """
     Load data from CSV files into memory.
+
+    If compact is True, the person <-> movie adjacency is stored in
+    an integer indexed CompactGraph instead of per-entry sets.
+
+    If snapshot is True, data is loaded from the binary snapshot in
+    directory when it is still up to date with the CSVs, and the
+    snapshot is (re)written after parsing the CSVs otherwise.
+
+    If parallel is True, the CSVs are parsed across worker processes.
+
+    If costars is True, a CostarGraph of who starred with whom is built
+    as well and unfiltered searches run on it.
+
+    If database is given, the CSVs are imported into that SQLite file
+    (once, until they change) and every lookup and search reads from
+    it instead, with only a bounded page cache kept in memory. True
+    uses degrees.sqlite in directory. The other options do not apply.
+
+    Every person is labelled with its connected component and movies
+    are indexed by year. Names are indexed for prefix and fuzzy search
+    by index_names on the first lookup that needs it.
+
+    Returns the number of star rows skipped because they name
+    a person or movie that is not in the data.
+    """
+    global data_version
+    data_version += 1
+
+    if database is not None:
+        return load_store(directory, None if database is True else database)
+    reset_data()
+
+    if snapshot:
+        skipped = load_snapshot(directory, compact)
+        if skipped is not None:
+            index_years()
+            index_costars(costars)
+            return skipped
+
+    if parallel:
+        skipped = load_parallel_data(directory, compact)
+    elif compact:
+        skipped = load_compact_data(directory)
+    else:
+        skipped = load_csv_data(directory)
+    label_components()
+    index_years()
+    index_costars(costars)
+
+    if snapshot:
+        save_snapshot(directory, skipped)
+    return skipped
+
+
+def load_store(directory, database=None):
+    """
+    Opens the SqliteStore of directory and points people, movies,
+    names and name_index at its views.
+
+    Returns the number of star rows skipped when it was imported.
+    """
+    global store, people, movies, names, graph, name_index, costar_graph, component_count
+    close_store()
+    store = SqliteStore.open(directory, database)
+    people = store.people
+    movies = store.movies
+    names = store.names
+    graph = None
+    name_index = store.names
+    costar_graph = None
+    movies_by_year.clear()
+    component_count = store.component_count
+    return store.skipped
+
+
+def close_store():
+    """
+    Closes the store, if any, and gives people, movies and names
+    back their own dictionaries.
+    """
+    global store, people, movies, names
+    if store is None:
+        return
+    store.close()
+    store = None
+    people = {}
+    movies = {}
+    names = {}
+
+
+def reset_data():
+    """
+    Drops everything loaded before, closing the store if there is one,
+    so that the next load starts from empty dictionaries and no graph.
+    """
+    global people, movies, names, graph, name_index, costar_graph, component_count
+    close_store()
+    people = {}
+    movies = {}
+    names = {}
+    graph = None
+    name_index = None
+    costar_graph = None
+    movies_by_year.clear()
+    component_count = 0
+
+
+def load_csv_data(directory):
+    """
+    Load data from CSV files into the people, movies and names dictionaries.
+
+    Returns the number of skipped star rows.
     """
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
-            people[row["id"]] = {
-                "name": row["name"],
-                "birth": row["birth"],
-                "movies": set()
-            }
-            if row["name"].lower() not in names:
-                names[row["name"].lower()] = {row["id"]}
-            else:
-                names[row["name"].lower()].add(row["id"])
+            add_person(row["id"], row["name"], row["birth"])["movies"] = set()
 
     # Load movies
     with open(f"{directory}/movies.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
-            movies[row["id"]] = {
-                "title": row["title"],
-                "year": row["year"],
-                "stars": set()
-            }
+            add_movie(row["id"], row["title"], row["year"])["stars"] = set()
+
+    # Load stars, counting rows that name an unknown person or movie
+    skipped = 0
+    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            if row["person_id"] not in people or row["movie_id"] not in movies:
+                skipped += 1
+                continue
+            people[row["person_id"]]["movies"].add(row["movie_id"])
+            movies[row["movie_id"]]["stars"].add(row["person_id"])
+    return skipped
+
+
+def add_person(person_id, name, birth):
+    """
+    Adds a person to the people dictionary and their name to names.
+
+    Returns the new entry of people.
+    """
+    people[person_id] = {
+        "name": name,
+        "birth": birth
+    }
+    add_name(person_id, name)
+    return people[person_id]
+
+
+def add_movie(movie_id, title, year):
+    """
+    Adds a movie to the movies dictionary.
+
+    Returns the new entry of movies.
+    """
+    movies[movie_id] = {
+        "title": title,
+        "year": year
+    }
+    return movies[movie_id]
+
+
+def use_columns(person_view, movie_view):
+    """
+    Points people and movies at the ColumnViews of compact data, shares
+    their indexes with graph and adds every person to names.
+    """
+    global people, movies
+    people = person_view
+    movies = movie_view
+    graph.person_index = person_view.index
+    graph.movie_index = movie_view.index
+    for person_id, name in zip(person_view.ids, person_view.columns["name"]):
+        add_name(person_id, name)
+
+
+def add_name(person_id, name):
+    """
+    Adds a person to the names dictionary and, once it is built, name_index.
+    """
+    if name.lower() not in names:
+        names[name.lower()] = {person_id}
+        if name_index is not None:
+            name_index.add(name.lower())
+    else:
+        names[name.lower()].add(person_id)
+
+
+def remove_name(person_id, name):
+    """
+    Removes a person from the names dictionary and, once it is built, name_index.
+    """
+    person_ids = names[name.lower()]
+    person_ids.discard(person_id)
+    if not person_ids:
+        del names[name.lower()]
+        if name_index is not None:
+            name_index.remove(name.lower())
+
+
+def load_snapshot(directory, compact):
+    """
+    Load data from the snapshot in directory.
+
+    Returns the number of star rows skipped when the snapshot was
+    written, or None, leaving everything untouched, if there is
+    no snapshot or it is out of date with the CSVs.
+    """
+    global graph, component_count
+
+    loaded = read_snapshot(directory)
+    if loaded is None:
+        return None
+    snapshot_graph, columns, skipped = loaded
+
+    component_count = max(snapshot_graph.components, default=-1) + 1
+    if compact:
+        graph = snapshot_graph
+        use_columns(
+            ColumnView(graph.person_ids, graph.person_index,
+                       {"name": columns["person_names"], "birth": columns["births"]}),
+            ColumnView(graph.movie_ids, graph.movie_index,
+                       {"title": columns["titles"], "year": columns["years"]})
+        )
+        return skipped
+
+    for person_id, name, birth in zip(columns["person_ids"], columns["person_names"], columns["births"]):
+        add_person(person_id, name, birth)
+    for movie_id, title, year in zip(columns["movie_ids"], columns["titles"], columns["years"]):
+        add_movie(movie_id, title, year)
+
+    # rebuild the movies and stars sets from the snapshot adjacency
+    person_ids = snapshot_graph.person_ids
+    movie_ids = snapshot_graph.movie_ids
+    for person, person_id in enumerate(person_ids):
+        people[person_id]["movies"] = {movie_ids[movie] for movie in snapshot_graph.movies_for(person)}
+        people[person_id]["component"] = snapshot_graph.components[person]
+    for movie, movie_id in enumerate(movie_ids):
+        movies[movie_id]["stars"] = {person_ids[person] for person in snapshot_graph.stars_for(movie)}
+    return skipped
+
+
+def save_snapshot(directory, skipped=0):
+    """
+    Write the loaded data and the number of skipped
+    star rows to the snapshot in directory.
+    """
+    if graph is not None:
+        snapshot_graph = graph
+    else:
+        snapshot_graph = CompactGraph.from_data(people, movies)
+        snapshot_graph.components = array("i", (people[person_id]["component"] for person_id in people))
+    person_ids = snapshot_graph.person_ids
+    movie_ids = snapshot_graph.movie_ids
+    if graph is not None:
+        # compact data already holds the columns, in the order of the graph
+        columns = {
+            "person_ids": person_ids,
+            "person_names": people.columns["name"],
+            "births": people.columns["birth"],
+            "movie_ids": movie_ids,
+            "titles": movies.columns["title"],
+            "years": movies.columns["year"]
+        }
+    else:
+        columns = {
+            "person_ids": person_ids,
+            "person_names": [people[person_id]["name"] for person_id in person_ids],
+            "births": [people[person_id]["birth"] for person_id in person_ids],
+            "movie_ids": movie_ids,
+            "titles": [movies[movie_id]["title"] for movie_id in movie_ids],
+            "years": [movies[movie_id]["year"] for movie_id in movie_ids]
+        }
+
+    # the snapshot is only a cache, a read-only data directory is fine
+    try:
+        write_snapshot(directory, snapshot_graph, columns, skipped)
+    except OSError:
+        pass
+
+
+def label_components():
+    """
+    Labels every loaded person with its connected component, in
+    graph.components for compact data or people[person_id]["component"].
+    """
+    global component_count
+
+    if graph is not None:
+        graph.components = component_labels(graph)
+        component_count = max(graph.components, default=-1) + 1
+        return
+    labels = component_ids(people, movies)
+    for person_id, component in labels.items():
+        people[person_id]["component"] = component
+    component_count = max(labels.values(), default=-1) + 1
+
+
+def index_names():
+    """
+    Returns the module level name_index, building it over
+    the loaded names if it has not been built yet.
+    """
+    global name_index
+    if name_index is None:
+        name_index = NameIndex(names)
+    return name_index
+
+
+def index_years():
+    """
+    Fills movies_by_year from the loaded movies.
+    """
+    movies_by_year.clear()
+    for movie_id, movie in movies.items():
+        if movie["year"].isdigit():
+            movies_by_year.setdefault(int(movie["year"]), set()).add(movie_id)
+
+
+def index_costars(costars=True):
+    """
+    Builds costar_graph from the loaded data, or drops it if costars is False.
+    """
+    global costar_graph
+    if not costars:
+        costar_graph = None
+        return
+    projected = graph if graph is not None else CompactGraph.from_data(people, movies)
+    costar_graph = CostarGraph.build(projected)
+
+
+def movie_filter(years=None, allow=None, deny=None):
+    """
+    Returns the set of movies a search may go through, for the
+    allowed argument of shortest_path and neighbors_for_person.
+
+    years is an inclusive (first, last) range where either end may be
+    None, allow limits the search to the given movie_ids and deny
+    leaves the given movie_ids out. For compact data the result is a
+    bytearray mask over movie indexes, for a store a MovieFilterView
+    checked in SQL, otherwise a set of movie_ids.
+    """
+    if store is not None:
+        return store.movie_filter(years, allow, deny)
+    if years is not None:
+        first, last = years
+        allowed = set()
+        for year, movie_ids in movies_by_year.items():
+            if (first is None or year >= first) and (last is None or year <= last):
+                allowed.update(movie_ids)
+    else:
+        allowed = set(movies)
+    if allow is not None:
+        allowed.intersection_update(allow)
+    if deny is not None:
+        allowed.difference_update(deny)
+
+    if graph is None:
+        return allowed
+    return movie_mask(graph, allowed)
+
+
+def movie_mask(movie_graph, movie_ids):
+    """
+    Returns a bytearray over the movie indexes of a CompactGraph
+    with the entries of the given movie_ids set.
+    """
+    mask = bytearray(len(movie_graph.movie_ids))
+    for movie_id in movie_ids:
+        mask[movie_graph.movie_index[movie_id]] = 1
+    return mask
+
+
+def connected(source, target):
+    """
+    Returns False if two people are in different components,
+    so no path between them can exist.
+    """
+    if graph is not None:
+        if graph.components is None:
+            return True
+        return graph.components[graph.person_index[source]] == graph.components[graph.person_index[target]]
+    return people[source].get("component") == people[target].get("component")
 
-    # Load stars
+
+def load_compact_data(directory):
+    """
+    Load data from CSV files into memory, keeping the adjacency
+    in a CompactGraph assigned to the module level graph and the
+    people and movies in columns indexed like it.
+
+    Returns the number of skipped star rows.
+    """
+    global graph
+
+    # Load people, sharing one string per distinct birth year
+    with open(f"{directory}/people.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        person_view = ColumnView.from_rows(
+            ((row["id"], row["name"], sys.intern(row["birth"])) for row in reader), ("name", "birth")
+        )
+
+    # Load movies
+    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        movie_view = ColumnView.from_rows(
+            ((row["id"], row["title"], sys.intern(row["year"])) for row in reader), ("title", "year")
+        )
+
+    person_index = person_view.index
+    movie_index = movie_view.index
+
+    # Load stars as parallel arrays of indexes
+    skipped = 0
+    edge_people = array("i")
+    edge_movies = array("i")
     with open(f"{directory}/stars.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
             try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
+                person = person_index[row["person_id"]]
+                movie = movie_index[row["movie_id"]]
             except KeyError:
-                pass
+                skipped += 1
+                continue
+            edge_people.append(person)
+            edge_movies.append(movie)
+
+    graph = CompactGraph.from_edges(person_view.ids, movie_view.ids, edge_people, edge_movies)
+    use_columns(person_view, movie_view)
+    return skipped
+
+
+def load_parallel_data(directory, compact):
+    """
+    Load data from CSV files into memory, parsing them across worker
+    processes with ingest.read_parallel.
+
+    Returns the number of skipped star rows.
+    """
+    global graph
+
+    person_rows, movie_rows, edge_people, edge_movies, skipped = read_parallel(directory)
+
+    # edge indexes follow the order of first appearance, like the columns and dictionaries
+    if compact:
+        person_view = ColumnView.from_rows(person_rows, ("name", "birth"))
+        movie_view = ColumnView.from_rows(movie_rows, ("title", "year"))
+        graph = CompactGraph.from_edges(person_view.ids, movie_view.ids, edge_people, edge_movies)
+        use_columns(person_view, movie_view)
+        return skipped
+
+    for person_id, name, birth in person_rows:
+        add_person(person_id, name, birth)
+    for movie_id, title, year in movie_rows:
+        add_movie(movie_id, title, year)
+    person_ids = list(people)
+    movie_ids = list(movies)
+
+    for person_id in person_ids:
+        people[person_id]["movies"] = set()
+    for movie_id in movie_ids:
+        movies[movie_id]["stars"] = set()
+    for person, movie in zip(edge_people, edge_movies):
+        people[person_ids[person]]["movies"].add(movie_ids[movie])
+        movies[movie_ids[movie]]["stars"].add(person_ids[person])
+    return skipped
 
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    if len(sys.argv) > 3:
+        sys.exit("Usage: python degrees.py [directory] [database]")
+    directory = sys.argv[1] if len(sys.argv) >= 2 else "large"
+    database = sys.argv[2] if len(sys.argv) == 3 else None
 
-    # Load data from files into memory
+    # Load data from files into memory, or from the database if one is given
     print("Loading data...")
-    load_data(directory)
+    skipped = load_data(directory, snapshot=True, database=database)
+    if skipped:
+        print(f"Skipped {skipped} star rows with an unknown person or movie.")
     print("Data loaded.")
 
     source = person_id_for_name(input("Name: "))
@@ -69,7 +554,7 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    path = shortest_path(source, target, bidirectional=True)
 
     if path is None:
         print("Not connected.")
@@ -84,104 +569,403 @@ def main():
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def build_landmarks(count=LANDMARKS, landmarks=None):
+    """
+    Precomputes a Landmarks distance oracle over the loaded data,
+    from the given landmark person_ids or the count best connected people.
+    """
+    landmark_graph = graph if graph is not None else CompactGraph.from_data(people, movies)
+    if landmarks is not None:
+        landmarks = [landmark_graph.person_index[person_id] for person_id in landmarks]
+    return Landmarks.build(landmark_graph, count, landmarks)
+
+
+def shortest_path(source, target, bidirectional=False, landmarks=None, allowed=None, stats=None):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
+    If bidirectional is True, the search grows from both ends
+    at once instead of only from the source.
+
+    If landmarks (from build_landmarks) is given, an A* search
+    guided by the landmark distances is used instead.
+
+    If allowed (from movie_filter) is given, only people who starred
+    together in one of the allowed movies count as connected.
+
+    Unfiltered results are kept in the module level cache, if any.
+
+    If stats (a SearchStats) is given, or stats_hook is set, the search
+    counters and the time spent in the "cache" and "search" phases are
+    recorded and the stats hook is called once the path is found.
+
     If no possible path, returns None.
     """
+    if stats is None and stats_hook is not None:
+        stats = SearchStats(stats_hook)
+
     # return an empty list if source equals target
+    if source == target:
+        path = []
+    elif cache is None or allowed is not None:
+        with phase(stats, "search"):
+            path = find_path(source, target, bidirectional, landmarks, allowed, stats)
+    else:
+        with phase(stats, "cache"):
+            found, path = cache.get(source, target, data_version)
+        if not found:
+            with phase(stats, "search"):
+                path = find_path(source, target, bidirectional, landmarks, stats=stats)
+            cache.put(source, target, path, data_version)
+
+    if stats is not None:
+        stats.done()
+    return path
+
+
+def find_path(source, target, bidirectional=False, landmarks=None, allowed=None, stats=None):
+    """
+    Searches for the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, without using the cache.
+
+    stats is an optional SearchStats to count the search in.
+
+    If no possible path, returns None.
+    """
     if source == target:
         return []
 
+    # people in different components are never connected
+    if not connected(source, target):
+        return None
+
+    if landmarks is not None:
+        # landmarks over dictionary data search their own compact graph
+        if allowed is not None and graph is None:
+            allowed = movie_mask(landmarks.graph, allowed)
+        return landmarks.shortest_path(source, target, allowed, stats)
+
+    # search the co-star projection when it is loaded
+    if costar_graph is not None and allowed is None:
+        projected = costar_graph.graph
+        source = projected.person_index[source]
+        target = projected.person_index[target]
+        if bidirectional:
+            path = bidirectional_path(source, target, costar_graph.neighbors, stats)
+        else:
+            path = projected.breadth_first_path(source, target, stats, costar_graph.neighbors)
+        return None if path is None else projected.path_ids(path)
+
+    # search the compact graph in index space when it is loaded
+    if graph is not None:
+        source = graph.person_index[source]
+        target = graph.person_index[target]
+        if allowed is not None:
+            path = bidirectional_path(source, target, partial(graph.neighbors, allowed=allowed), stats)
+        elif bidirectional:
+            path = bidirectional_path(source, target, graph.neighbors, stats)
+        else:
+            path = graph.breadth_first_path(source, target, stats)
+        return None if path is None else graph.path_ids(path)
+
+    # search the store a whole layer of people per query
+    if store is not None:
+        return bidirectional_path(source, target, None, stats, partial(store.neighbors_for_people, allowed=allowed))
+
+    # filtered searches always grow from both ends
+    if allowed is not None:
+        return bidirectional_path(source, target, partial(neighbors_for_person, allowed=allowed), stats)
+
     # Check if source and target acted together in some movie and return it
     common_movies = people[source]["movies"] & people[target]["movies"]
     if common_movies:
         return [(next(iter(common_movies)), target)]
-    
-    # initialize the frontier and add the start node
-    frontier = QueueFrontier()
-    start_node = Node(state=source, parent=None, action=None)
-    frontier.add(start_node)
 
-    # initialize already checked id's set
-    explored = {source}
+    if bidirectional:
+        return bidirectional_path(source, target, neighbors_for_person, stats)
+
+    # count every expansion when collecting stats
+    expand = neighbors_for_person if stats is None else stats.counted(neighbors_for_person)
+
+    # parent person_id and connecting movie_id of every reached person
+    parents = {source: None}
+
+    # initialize the frontier with the source
+    frontier = deque([source])
 
     # begin the bfs search loop
-    while not frontier.empty():
+    while frontier:
 
-        # get one node from the frontier
-        node = frontier.remove()
+        if stats is not None:
+            stats.frontier(len(frontier))
 
-        # get neighbours for person filtering out current person_id
-        neighbors = {
-            (movie_id, person_id)
-            for movie_id, person_id in neighbors_for_person(node.state)
-            if person_id != node.state
-        }
+        # get one person from the frontier
+        person = frontier.popleft()
 
         # iterate trough all neighbours
-        for movie_id, person_id in neighbors:
-            
-            # discard person_id, if it's already in the explored set
-            if person_id in explored:
-                continue
+        for movie_id, person_id in expand(person):
 
-            # create one node for each valid connection
-            child_node = Node(state=person_id, parent=node, action=movie_id)
+            # discard person_id, if it's already been reached
+            if person_id in parents:
+                continue
+            parents[person_id] = (movie_id, person)
 
             # check if we are on target
             if person_id == target:
-                path = []
-                # rebuild the path
-                while child_node.parent is not None:
-                    path.append((child_node.action, child_node.state))
-                    child_node = child_node.parent
-                path.reverse()
-                return path
-            
-            # add the node to the frontier and explored set
-            frontier.add(child_node)
-            explored.add(person_id)
+                if stats is not None:
+                    stats.reached = len(parents) - 1
+                return _walk_back(target, parents)
+
+            # add the person to the frontier
+            frontier.append(person_id)
 
+    if stats is not None:
+        stats.reached = len(parents) - 1
     return None
 
 
+def bidirectional_path(source, target, neighbors, stats=None, batch=None):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, searching breadth first
+    from both people and always expanding the smaller frontier.
+
+    neighbors(person) must return the (movie, person) pairs of a person,
+    so the same search runs on person_ids or CompactGraph indexes.
+
+    stats is an optional SearchStats to count the search in.
+
+    If batch is given, batch(layer) is called instead to fetch the
+    neighbors of a whole layer at once as a dictionary, for data that
+    is slow to look up one person at a time.
+
+    If no possible path, returns None.
+    """
+    if source == target:
+        return []
+
+    # each side maps a person_id to the (movie_id, person_id) it was reached from
+    forward = {source: None}
+    backward = {target: None}
+    forward_layer = [source]
+    backward_layer = [target]
+
+    while forward_layer and backward_layer:
+        if stats is not None:
+            stats.frontier(len(forward_layer) + len(backward_layer))
+
+        # grow the side with fewer people waiting to be expanded
+        if len(forward_layer) <= len(backward_layer):
+            layer, parents, other_parents = forward_layer, forward, backward
+        else:
+            layer, parents, other_parents = backward_layer, backward, forward
+
+        expand = neighbors if batch is None else batch(layer).__getitem__
+        if stats is not None:
+            expand = stats.counted(expand)
+        layer, meeting = _expand_layer(layer, parents, other_parents, expand)
+        if parents is forward:
+            forward_layer = layer
+        else:
+            backward_layer = layer
+
+        if meeting is not None:
+            if stats is not None:
+                stats.reached = len(forward) + len(backward) - 2
+            return _join_paths(meeting, forward, backward)
+
+    if stats is not None:
+        stats.reached = len(forward) + len(backward) - 2
+    return None
+
+
+def _expand_layer(layer, parents, other_parents, neighbors):
+    """
+    Expands every person in layer by one step, recording parents.
+
+    Returns the next layer and the first person_id already reached
+    by the other side, or None if the two searches have not met yet.
+    """
+    next_layer = []
+    for person in layer:
+        for movie_id, person_id in neighbors(person):
+            if person_id in parents:
+                continue
+            parents[person_id] = (movie_id, person)
+
+            # the two sides never share a person until they meet, so the
+            # first meeting in a full layer is already a shortest one
+            if person_id in other_parents:
+                return next_layer, person_id
+            next_layer.append(person_id)
+    return next_layer, None
+
+
+def _join_paths(meeting, forward, backward):
+    """
+    Rebuilds the (movie_id, person_id) path through the meeting person
+    from the parents recorded by both sides of a bidirectional search.
+    """
+    # walk back from the meeting person to the source
+    path = _walk_back(meeting, forward)
+
+    # then walk forward from the meeting person to the target
+    person_id = meeting
+    while backward[person_id] is not None:
+        movie_id, person_id = backward[person_id]
+        path.append((movie_id, person_id))
+    return path
+
+
+def _walk_back(person_id, parents):
+    """
+    Returns the (movie_id, person_id) path from the person parents
+    started from to person_id, following the recorded parents back.
+    """
+    path = []
+    while parents[person_id] is not None:
+        movie_id, parent = parents[person_id]
+        path.append((movie_id, person_id))
+        person_id = parent
+    path.reverse()
+    return path
+
+
+def all_shortest_paths(source, target, allowed=None):
+    """
+    Lazily yields every distinct shortest list of (movie_id, person_id)
+    pairs that connect the source to the target, including paths that
+    only differ in the movie two people share.
+
+    The breadth first layers and predecessor lists are recorded once,
+    then paths are generated one at a time from them, so taking the
+    first few never builds the rest.
+
+    allowed is an optional movie filter, as for shortest_path.
+
+    Yields nothing if there is no possible path.
+    """
+    if source == target:
+        yield []
+        return
+    if not connected(source, target):
+        return
+
+    if graph is not None:
+        predecessors = _shortest_path_predecessors(
+            graph.person_index[source], graph.person_index[target],
+            partial(graph.neighbors, allowed=allowed)
+        )
+        if predecessors is not None:
+            for path in _walk_predecessors(graph.person_index[target], predecessors):
+                yield graph.path_ids(path)
+        return
+
+    predecessors = _shortest_path_predecessors(source, target, partial(neighbors_for_person, allowed=allowed))
+    if predecessors is not None:
+        yield from _walk_predecessors(target, predecessors)
+
+
+def _shortest_path_predecessors(source, target, neighbors):
+    """
+    Runs a breadth first search from source that stops after the layer
+    holding target.
+
+    Returns a dictionary mapping every reached person to the list of
+    (movie, person) pairs one layer closer to source that lead to it,
+    or None if target cannot be reached.
+    """
+    predecessors = {source: []}
+    layer = [source]
+    while layer:
+        next_layer = {}
+        for person in layer:
+            for movie, neighbor in neighbors(person):
+                if neighbor in predecessors:
+                    continue
+                next_layer.setdefault(neighbor, []).append((movie, person))
+        predecessors.update(next_layer)
+        if target in next_layer:
+            return predecessors
+        layer = list(next_layer)
+    return None
+
+
+def _walk_predecessors(person, predecessors):
+    """
+    Yields every path from the search source to person
+    following the recorded predecessor lists.
+    """
+    if not predecessors[person]:
+        yield []
+        return
+    for movie, parent in predecessors[person]:
+        for path in _walk_predecessors(parent, predecessors):
+            path.append((movie, person))
+            yield path
+
+
 def person_id_for_name(name):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
+
+    If nobody has exactly that name, the closest names
+    from name_index are offered instead.
     """
     person_ids = list(names.get(name.lower(), set()))
     if len(person_ids) == 0:
-        return None
+        candidates = index_names().search(name)
+        person_ids = [person_id for candidate in candidates for person_id in sorted(names[candidate])]
+        if len(person_ids) == 0:
+            return None
+        print(f"No exact match for '{name}'. Did you mean:")
+        return choose_person(person_ids)
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
-        for person_id in person_ids:
-            person = people[person_id]
-            name = person["name"]
-            birth = person["birth"]
-            print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
-        try:
-            person_id = input("Intended Person ID: ")
-            if person_id in person_ids:
-                return person_id
-        except ValueError:
-            pass
-        return None
+        return choose_person(person_ids)
     else:
         return person_ids[0]
 
 
-def neighbors_for_person(person_id):
+def choose_person(person_ids):
+    """
+    Lists the given people and returns the
+    person_id the user picks, or None.
+    """
+    for person_id in person_ids:
+        person = people[person_id]
+        name = person["name"]
+        birth = person["birth"]
+        print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
+    try:
+        person_id = input("Intended Person ID: ")
+        if person_id in person_ids:
+            return person_id
+    except ValueError:
+        pass
+    return None
+
+
+def neighbors_for_person(person_id, allowed=None):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
+
+    If allowed (from movie_filter) is given, only
+    allowed movies are taken into account.
     """
+    if graph is not None:
+        return graph.neighbors_for_person(person_id, allowed)
+    if store is not None:
+        return store.neighbors_for_person(person_id, allowed)
+
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
+        if allowed is not None and movie_id not in allowed:
+            continue
         for person_id in movies[movie_id]["stars"]:
             neighbors.add((movie_id, person_id))
     return neighbors
@@ -0,0 +1,376 @@
+import csv
+import os
+import sys
+from itertools import islice
+
+import degrees
+from components import PersonComponents, merge_group, split_group
+from snapshot import snapshot_skipped
+
+# Columns of the rows of each delta file, after the leading op column
+DELTA_FILES = {
+    "people.csv": ("id", "name", "birth"),
+    "movies.csv": ("id", "title", "year"),
+    "stars.csv": ("person_id", "movie_id")
+}
+
+
+def read_delta(directory):
+    """
+    Reads the delta files of directory.
+
+    A delta directory holds any of people.csv, movies.csv and stars.csv
+    with the columns of the data files plus a leading op column that is
+    either "add" or "remove". Removals only need the id columns.
+
+    Returns a dictionary of row lists keyed by "add_people",
+    "remove_people", "add_movies", "remove_movies", "add_stars"
+    and "remove_stars".
+    """
+    delta = {}
+    for filename, columns in DELTA_FILES.items():
+        kind = "stars" if filename == "stars.csv" else filename[:-len(".csv")]
+        delta[f"add_{kind}"] = []
+        delta[f"remove_{kind}"] = []
+        path = os.path.join(directory, filename)
+        if not os.path.exists(path):
+            continue
+        with open(path, encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                if row["op"] not in ("add", "remove"):
+                    raise ValueError(f"unknown op {row['op']!r} in {path}")
+                if row["op"] == "add":
+                    delta[f"add_{kind}"].append(tuple(row[column] for column in columns))
+                elif kind == "stars":
+                    delta["remove_stars"].append((row["person_id"], row["movie_id"]))
+                else:
+                    delta[f"remove_{kind}"].append(row["id"])
+    return delta
+
+
+def apply_delta(delta_directory, directory=None):
+    """
+    Applies the delta in delta_directory to the data loaded by
+    degrees.load_data, in either representation.
+
+    Removals go first (stars, then movies, then people), then additions
+    (people, then movies, then stars). The names dictionary, name index
+    and component labels are updated for the people and connections that
+    changed, and only the cached paths the delta can affect are dropped.
+    A loaded co-star projection is rebuilt.
+
+    If directory holds an up to date snapshot, it is rewritten with the
+    delta applied.
+
+    Returns the number of delta rows skipped because they name an
+    unknown id, add something that exists or remove something that does not.
+    """
+    if degrees.store is not None:
+        raise ValueError("deltas cannot be applied to a SQLite store, import the updated CSVs instead")
+    delta = read_delta(delta_directory)
+    if degrees.graph is None:
+        changes = _apply_to_dictionaries(delta)
+    else:
+        changes = _apply_to_graph(delta)
+    skipped, removed_people, removed_credits, added_people, touched, casts = changes
+
+    _update_components(added_people, touched, casts)
+    _update_cache(removed_people, removed_credits, bool(casts))
+
+    # the co-star projection is rebuilt rather than patched
+    if degrees.costar_graph is not None:
+        degrees.index_costars()
+
+    if directory is not None:
+        snapshot = snapshot_skipped(directory)
+        if snapshot is not None:
+            degrees.save_snapshot(directory, snapshot)
+    return skipped
+
+
+def _apply_to_dictionaries(delta):
+    """
+    Applies delta to the people and movies dictionaries and their sets.
+
+    Returns (skipped, removed people, removed (person_id, movie_id)
+    credits, added people, people touched by removals, casts of movies
+    that gained stars).
+    """
+    people = degrees.people
+    movies = degrees.movies
+    skipped = 0
+    removed_people = set()
+    removed_credits = set()
+    touched = []
+
+    for person_id, movie_id in delta["remove_stars"]:
+        if person_id not in people or movie_id not in movies or movie_id not in people[person_id]["movies"]:
+            skipped += 1
+            continue
+        people[person_id]["movies"].remove(movie_id)
+        movies[movie_id]["stars"].remove(person_id)
+        removed_credits.add((person_id, movie_id))
+        touched.append(person_id)
+        touched.extend(islice(movies[movie_id]["stars"], 1))
+
+    for movie_id in delta["remove_movies"]:
+        movie = movies.pop(movie_id, None)
+        if movie is None:
+            skipped += 1
+            continue
+        _remove_year(movie_id, movie["year"])
+        for person_id in movie["stars"]:
+            people[person_id]["movies"].remove(movie_id)
+            removed_credits.add((person_id, movie_id))
+        touched.extend(movie["stars"])
+
+    for person_id in delta["remove_people"]:
+        person = people.pop(person_id, None)
+        if person is None:
+            skipped += 1
+            continue
+        degrees.remove_name(person_id, person["name"])
+        for movie_id in person["movies"]:
+            stars = movies[movie_id]["stars"]
+            stars.remove(person_id)
+            removed_credits.add((person_id, movie_id))
+            touched.extend(islice(stars, 1))
+        removed_people.add(person_id)
+
+    added_people = []
+    for person_id, name, birth in delta["add_people"]:
+        if person_id in people:
+            skipped += 1
+            continue
+        degrees.add_person(person_id, name, birth)["movies"] = set()
+        added_people.append(person_id)
+
+    for movie_id, title, year in delta["add_movies"]:
+        if movie_id in movies:
+            skipped += 1
+            continue
+        degrees.add_movie(movie_id, title, year)["stars"] = set()
+        _add_year(movie_id, year)
+
+    grown = {}
+    for person_id, movie_id in delta["add_stars"]:
+        if person_id not in people or movie_id not in movies or movie_id in people[person_id]["movies"]:
+            skipped += 1
+            continue
+        people[person_id]["movies"].add(movie_id)
+        movies[movie_id]["stars"].add(person_id)
+        grown[movie_id] = None
+
+    casts = [list(movies[movie_id]["stars"]) for movie_id in grown]
+    return skipped, removed_people, removed_credits, added_people, touched, casts
+
+
+def _apply_to_graph(delta):
+    """
+    Applies delta to compact data: replaces degrees.graph with a
+    CompactGraph remapped from the old one and degrees.people and
+    degrees.movies with column views remapped to match it.
+
+    Returns the same tuple as _apply_to_dictionaries.
+    """
+    people = degrees.people
+    movies = degrees.movies
+    graph = degrees.graph
+    skipped = 0
+    removed_people = set()
+    removed_movies = set()
+    removed_credits = set()
+    touched = []
+
+    # id -> values of the people and movies added, the views are only replaced at the end
+    new_people = {}
+    new_movies = {}
+
+    def has_person(person_id):
+        return person_id in new_people or (person_id in people and person_id not in removed_people)
+
+    def has_movie(movie_id):
+        return movie_id in new_movies or (movie_id in movies and movie_id not in removed_movies)
+
+    def movies_of(person_id):
+        return {
+            graph.movie_ids[movie] for movie in graph.movies_for(graph.person_index[person_id])
+            if (person_id, graph.movie_ids[movie]) not in removed_credits
+        }
+
+    def stars_of(movie_id):
+        return [
+            graph.person_ids[person] for person in graph.stars_for(graph.movie_index[movie_id])
+            if (graph.person_ids[person], movie_id) not in removed_credits
+        ]
+
+    for person_id, movie_id in delta["remove_stars"]:
+        if not has_person(person_id) or not has_movie(movie_id) or movie_id not in movies_of(person_id):
+            skipped += 1
+            continue
+        removed_credits.add((person_id, movie_id))
+        touched.append(person_id)
+        touched.extend(stars_of(movie_id)[:1])
+
+    for movie_id in delta["remove_movies"]:
+        if not has_movie(movie_id):
+            skipped += 1
+            continue
+        stars = stars_of(movie_id)
+        removed_credits.update((person_id, movie_id) for person_id in stars)
+        touched.extend(stars)
+        _remove_year(movie_id, movies[movie_id]["year"])
+        removed_movies.add(movie_id)
+
+    for person_id in delta["remove_people"]:
+        if not has_person(person_id):
+            skipped += 1
+            continue
+        person_movies = movies_of(person_id)
+        removed_credits.update((person_id, movie_id) for movie_id in person_movies)
+        for movie_id in person_movies:
+            touched.extend(stars_of(movie_id)[:1])
+        degrees.remove_name(person_id, people[person_id]["name"])
+        removed_people.add(person_id)
+
+    added_people = []
+    for person_id, name, birth in delta["add_people"]:
+        if has_person(person_id):
+            skipped += 1
+            continue
+        new_people[person_id] = (name, birth)
+        degrees.add_name(person_id, name)
+        added_people.append(person_id)
+
+    added_movies = []
+    for movie_id, title, year in delta["add_movies"]:
+        if has_movie(movie_id):
+            skipped += 1
+            continue
+        new_movies[movie_id] = (title, year)
+        _add_year(movie_id, year)
+        added_movies.append(movie_id)
+
+    def credited(person_id, movie_id):
+        # people and movies removed and added back in the same delta start over
+        if person_id in removed_people or person_id not in graph.person_index:
+            return False
+        if movie_id in removed_movies or movie_id not in graph.movie_index:
+            return False
+        return movie_id in movies_of(person_id)
+
+    added_credits = {}
+    for person_id, movie_id in delta["add_stars"]:
+        if (not has_person(person_id) or not has_movie(movie_id)
+                or credited(person_id, movie_id) or (person_id, movie_id) in added_credits):
+            skipped += 1
+            continue
+        added_credits[person_id, movie_id] = None
+
+    graph = graph.updated(removed_people, removed_movies, removed_credits,
+                          added_people, added_movies, list(added_credits))
+    degrees.graph = graph
+    degrees.people = people.remapped(graph.person_ids, graph.person_index, new_people)
+    degrees.movies = movies.remapped(graph.movie_ids, graph.movie_index, new_movies)
+
+    grown = dict.fromkeys(movie_id for _, movie_id in added_credits)
+    casts = [
+        [graph.person_ids[person] for person in graph.stars_for(graph.movie_index[movie_id])]
+        for movie_id in grown
+    ]
+    return skipped, removed_people, removed_credits, added_people, touched, casts
+
+
+def _add_year(movie_id, year):
+    """
+    Adds a movie to degrees.movies_by_year.
+    """
+    if year.isdigit():
+        degrees.movies_by_year.setdefault(int(year), set()).add(movie_id)
+
+
+def _remove_year(movie_id, year):
+    """
+    Removes a movie from degrees.movies_by_year.
+    """
+    if year.isdigit():
+        movie_ids = degrees.movies_by_year[int(year)]
+        movie_ids.discard(movie_id)
+        if not movie_ids:
+            del degrees.movies_by_year[int(year)]
+
+
+def _update_components(added_people, touched, casts):
+    """
+    Gives added people their own component, splits the components that
+    lost connections between touched people and merges the components
+    joined by the casts of movies that gained stars.
+    """
+    graph = degrees.graph
+    if graph is not None:
+        labels = graph.components
+        neighbors = graph.neighbors
+        index = graph.person_index
+
+        def node(person_id):
+            return index[person_id]
+    else:
+        labels = PersonComponents(degrees.people)
+        neighbors = degrees.neighbors_for_person
+
+        def node(person_id):
+            return person_id
+
+    for person_id in added_people:
+        labels[node(person_id)] = degrees.component_count
+        degrees.component_count += 1
+
+    touched = [node(person_id) for person_id in touched if person_id in degrees.people]
+    degrees.component_count = split_group(touched, neighbors, labels, degrees.component_count)
+
+    for cast in casts:
+        merge_group([node(person_id) for person_id in cast], neighbors, labels)
+
+
+def _update_cache(removed_people, removed_credits, added):
+    """
+    Drops the cached paths a delta can change: paths through removed
+    credits, "not connected" answers for people who are now connected
+    and, if anything was added, every path longer than one movie.
+    """
+    if degrees.cache is None:
+        return
+
+    def keep(source, target, path):
+        if source not in degrees.people or target not in degrees.people:
+            return False
+        if path is None:
+            return not degrees.connected(source, target)
+        if added and len(path) > 1:
+            return False
+        previous = source
+        for movie_id, person_id in path:
+            if (previous, movie_id) in removed_credits or (person_id, movie_id) in removed_credits:
+                return False
+            previous = person_id
+        return True
+
+    degrees.cache.retain(keep, degrees.data_version)
+
+
+def main():
+    if len(sys.argv) != 3:
+        sys.exit("Usage: python deltas.py directory delta_directory")
+    directory, delta_directory = sys.argv[1], sys.argv[2]
+
+    # Bring the snapshot of directory up to date with the delta
+    degrees.load_data(directory, compact=True, snapshot=True)
+    skipped = apply_delta(delta_directory, directory)
+    if skipped:
+        print(f"Skipped {skipped} delta rows.")
+    print("Delta applied.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+import csv
+import os
+import random
+import sys
+from itertools import accumulate
+
+# Cast sizes follow a Pareto tail: most movies have a handful of stars, a few have hundreds
+CAST_SHAPE = 1.6
+MIN_CAST = 2
+MAX_CAST = 500
+
+# How unevenly credits are spread over people: a few are in many movies, most in one or two
+ACTIVITY_SHAPE = 1.3
+
+# Average number of credits per person
+CREDITS_PER_PERSON = 3
+
+SYLLABLES = [
+    "al", "an", "ar", "bel", "ca", "da", "el", "fa", "gar", "ha", "is", "jo",
+    "ka", "la", "li", "ma", "mi", "na", "no", "or", "pa", "ra", "ri", "sa",
+    "ta", "te", "to", "va", "vi", "wil", "ya", "zo"
+]
+
+WORDS = [
+    "Night", "Return", "Last", "City", "Love", "War", "Dark", "Road", "Summer",
+    "Secret", "Blue", "King", "House", "River", "Fire", "Dream", "Star", "Lost",
+    "Island", "Storm", "Heart", "Ghost", "Iron", "Silent", "Golden", "Wild"
+]
+
+
+def generate(directory, credits, seed=None):
+    """
+    Writes people.csv, movies.csv and stars.csv to directory with about
+    the given number of star credits, in the format load_data reads.
+
+    Cast sizes are drawn from a power law and every cast is drawn from
+    people weighted by a power law activity, so the graph has the few
+    huge hubs and long tail of small casts of the real IMDb data.
+
+    Returns (people, movies, credits) as written.
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+
+    # draw cast sizes until they add up to the requested credits
+    casts = []
+    total = 0
+    while total < credits:
+        size = min(MIN_CAST - 1 + int(rng.paretovariate(CAST_SHAPE)), MAX_CAST, credits - total)
+        casts.append(size)
+        total += size
+
+    person_count = max(max(casts), credits // CREDITS_PER_PERSON)
+    weights = list(accumulate(rng.paretovariate(ACTIVITY_SHAPE) for _ in range(person_count)))
+
+    with open(os.path.join(directory, "people.csv"), "w", encoding="utf-8", newline="") as f:
+        f.write("id,name,birth\n")
+        writer = csv.writer(f, quoting=csv.QUOTE_NONNUMERIC)
+        for person in range(person_count):
+            writer.writerow([person + 1, person_name(rng), rng.randint(1900, 2005)])
+
+    with open(os.path.join(directory, "movies.csv"), "w", encoding="utf-8", newline="") as f:
+        f.write("id,title,year\n")
+        writer = csv.writer(f, quoting=csv.QUOTE_NONNUMERIC)
+        for movie in range(len(casts)):
+            writer.writerow([movie + 1, movie_title(rng), rng.randint(1920, 2024)])
+
+    written = 0
+    with open(os.path.join(directory, "stars.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["person_id", "movie_id"])
+        for movie, size in enumerate(casts):
+            # a cast never lists the same person twice
+            cast = set(rng.choices(range(person_count), cum_weights=weights, k=size))
+            for person in cast:
+                writer.writerow([person + 1, movie + 1])
+            written += len(cast)
+
+    return person_count, len(casts), written
+
+
+def person_name(rng):
+    """
+    Returns a made up "First Last" name.
+    """
+    first = "".join(rng.choices(SYLLABLES, k=rng.randint(2, 3))).capitalize()
+    last = "".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))).capitalize()
+    return f"{first} {last}"
+
+
+def movie_title(rng):
+    """
+    Returns a made up movie title.
+    """
+    return " ".join(rng.choices(WORDS, k=rng.randint(1, 3)))
+
+
+def main():
+    if len(sys.argv) not in (3, 4):
+        sys.exit("Usage: python generate.py directory credits [seed]")
+    directory = sys.argv[1]
+    credits = int(float(sys.argv[2]))
+    seed = int(sys.argv[3]) if len(sys.argv) == 4 else None
+
+    people, movies, credits = generate(directory, credits, seed)
+    print(f"Wrote {people} people, {movies} movies and {credits} credits to {directory}")
+
+
+if __name__ == "__main__":
+    main()
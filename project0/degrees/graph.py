@@ -0,0 +1,255 @@
+from array import array
+from functools import cached_property
+
+
+class CompactGraph():
+    """
+    Integer indexed people <-> movies graph.
+
+    Every person and movie id is mapped to a dense index and the
+    bipartite adjacency is kept in CSR form: the movies of person i are
+    person_movies[person_offsets[i]:person_offsets[i + 1]] and the stars
+    of movie j are movie_people[movie_offsets[j]:movie_offsets[j + 1]].
+
+    components optionally holds the connected component of every person.
+    """
+
+    def __init__(self, person_ids, movie_ids, person_offsets, person_movies,
+                 movie_offsets, movie_people, components=None):
+        self.person_ids = person_ids
+        self.movie_ids = movie_ids
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_people = movie_people
+        self.components = components
+
+    @classmethod
+    def from_edges(cls, person_ids, movie_ids, edge_people, edge_movies):
+        """
+        Builds the graph from parallel arrays of (person, movie) indexes,
+        one entry per star credit. Repeated credits are dropped.
+        """
+        person_offsets, person_movies = _csr(len(person_ids), edge_people, edge_movies)
+
+        # drop repeated credits so every row only lists a movie once
+        rows = array("i")
+        deduped = array("i")
+        start = 0
+        for person in range(len(person_ids)):
+            end = person_offsets[person + 1]
+            row = sorted(set(person_movies[start:end]))
+            deduped.extend(row)
+            rows.extend([person] * len(row))
+            person_offsets[person + 1] = len(deduped)
+            start = end
+        person_movies = deduped
+
+        movie_offsets, movie_people = _csr(len(movie_ids), person_movies, rows)
+        return cls(person_ids, movie_ids, person_offsets, person_movies,
+                   movie_offsets, movie_people)
+
+    @classmethod
+    def from_data(cls, people, movies):
+        """
+        Builds the graph from the people and movies dictionaries
+        filled in by degrees.load_data.
+        """
+        person_ids = list(people)
+        movie_ids = list(movies)
+        person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+        movie_index = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+        edge_people = array("i")
+        edge_movies = array("i")
+        for movie_id, movie in movies.items():
+            for person_id in movie["stars"]:
+                edge_people.append(person_index[person_id])
+                edge_movies.append(movie_index[movie_id])
+        return cls.from_edges(person_ids, movie_ids, edge_people, edge_movies)
+
+    def updated(self, removed_people, removed_movies, removed_credits,
+                added_people, added_movies, added_credits):
+        """
+        Returns a new CompactGraph with a delta applied.
+
+        Removed person and movie ids are dropped along with their credits,
+        added ids are appended, and credits are (person_id, movie_id) pairs.
+        The remaining adjacency is remapped straight from the CSR arrays.
+        Components of kept people carry over, added people get -1.
+        """
+        person_ids = [person_id for person_id in self.person_ids if person_id not in removed_people] + added_people
+        movie_ids = [movie_id for movie_id in self.movie_ids if movie_id not in removed_movies] + added_movies
+        person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+        movie_index = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+
+        # old index -> new index, -1 for removed entries
+        person_map = array("i", (person_index.get(person_id, -1) for person_id in self.person_ids))
+        movie_map = array("i", (movie_index.get(movie_id, -1) for movie_id in self.movie_ids))
+        removed = {
+            (self.person_index[person_id], self.movie_index[movie_id])
+            for person_id, movie_id in removed_credits
+        }
+
+        edge_people = array("i")
+        edge_movies = array("i")
+        for person in range(len(self.person_ids)):
+            if person_map[person] == -1:
+                continue
+            for movie in self.movies_for(person):
+                if movie_map[movie] == -1 or (person, movie) in removed:
+                    continue
+                edge_people.append(person_map[person])
+                edge_movies.append(movie_map[movie])
+        for person_id, movie_id in added_credits:
+            edge_people.append(person_index[person_id])
+            edge_movies.append(movie_index[movie_id])
+
+        graph = CompactGraph.from_edges(person_ids, movie_ids, edge_people, edge_movies)
+        graph.person_index = person_index
+        graph.movie_index = movie_index
+        if self.components is not None:
+            graph.components = array("i", [-1]) * len(person_ids)
+            for person, new in enumerate(person_map):
+                if new != -1:
+                    graph.components[new] = self.components[person]
+        return graph
+
+    @cached_property
+    def person_index(self):
+        """
+        Maps person_ids to their index, built on first use.
+        """
+        return {person_id: i for i, person_id in enumerate(self.person_ids)}
+
+    @cached_property
+    def movie_index(self):
+        """
+        Maps movie_ids to their index, built on first use.
+        """
+        return {movie_id: i for i, movie_id in enumerate(self.movie_ids)}
+
+    def movies_for(self, person):
+        """
+        Returns the movie indexes of the person at index person.
+        """
+        return self.person_movies[self.person_offsets[person]:self.person_offsets[person + 1]]
+
+    def stars_for(self, movie):
+        """
+        Returns the person indexes who starred in the movie at index movie.
+        """
+        return self.movie_people[self.movie_offsets[movie]:self.movie_offsets[movie + 1]]
+
+    def neighbors(self, person, allowed=None):
+        """
+        Yields (movie, person) index pairs for people
+        who starred with the person at index person.
+
+        If allowed is given, only movies whose entry in
+        it is set (such as a bytearray mask) are used.
+        """
+        person_offsets = self.person_offsets
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_people = self.movie_people
+        for k in range(person_offsets[person], person_offsets[person + 1]):
+            movie = person_movies[k]
+            if allowed is not None and not allowed[movie]:
+                continue
+            for n in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                yield movie, movie_people[n]
+
+    def neighbors_for_person(self, person_id, allowed=None):
+        """
+        Returns (movie_id, person_id) pairs for people
+        who starred with a given person, in allowed movies only if given.
+        """
+        return {
+            (self.movie_ids[movie], self.person_ids[person])
+            for movie, person in self.neighbors(self.person_index[person_id], allowed)
+        }
+
+    def breadth_first_path(self, source, target, stats=None, neighbors=None):
+        """
+        Returns the shortest list of (movie, person) index pairs
+        that connect the source index to the target index.
+
+        stats is an optional SearchStats to count the search in and
+        neighbors an optional replacement for self.neighbors over the
+        same indexes, such as CostarGraph.neighbors.
+
+        If no possible path, returns None.
+        """
+        if source == target:
+            return []
+        if neighbors is None:
+            neighbors = self.neighbors
+        if stats is not None:
+            neighbors = stats.counted(neighbors)
+
+        # parent person and connecting movie of every reached person, -1 if unreached
+        parents = array("i", [-1]) * len(self.person_ids)
+        actions = array("i", [-1]) * len(self.person_ids)
+        parents[source] = source
+
+        layer = [source]
+        while layer:
+            if stats is not None:
+                stats.frontier(len(layer))
+            next_layer = []
+            for person in layer:
+                for movie, neighbor in neighbors(person):
+                    if parents[neighbor] != -1:
+                        continue
+                    parents[neighbor] = person
+                    actions[neighbor] = movie
+                    if neighbor == target:
+                        if stats is not None:
+                            stats.reached = len(parents) - parents.count(-1) - 1
+                        return self.rebuild_path(target, parents, actions, source)
+                    next_layer.append(neighbor)
+            layer = next_layer
+
+        if stats is not None:
+            stats.reached = len(parents) - parents.count(-1) - 1
+        return None
+
+    def rebuild_path(self, person, parents, actions, source):
+        """
+        Walks the parents array back from person to source and returns
+        the (movie, person) index pairs in order.
+        """
+        path = []
+        while person != source:
+            path.append((actions[person], person))
+            person = parents[person]
+        path.reverse()
+        return path
+
+    def path_ids(self, path):
+        """
+        Converts a list of (movie, person) index pairs
+        into (movie_id, person_id) pairs.
+        """
+        return [(self.movie_ids[movie], self.person_ids[person]) for movie, person in path]
+
+
+def _csr(rows, row_of, values):
+    """
+    Groups values by row_of with a counting sort.
+
+    Returns an offsets array of length rows + 1 and the values array
+    ordered by row.
+    """
+    offsets = array("i", [0]) * (rows + 1)
+    for row in row_of:
+        offsets[row + 1] += 1
+    for row in range(rows):
+        offsets[row + 1] += offsets[row]
+
+    cursor = offsets[:-1]
+    ordered = array("i", [0]) * len(values)
+    for row, value in zip(row_of, values):
+        ordered[cursor[row]] = value
+        cursor[row] += 1
+    return offsets, ordered
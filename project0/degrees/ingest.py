@@ -0,0 +1,131 @@
+import csv
+import io
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+# Size in bytes of each piece of stars.csv handed to a worker
+CHUNK_SIZE = 16 * 1024 * 1024
+
+# Id -> index maps and stars.csv column positions, set once in every worker by _init_worker
+_person_index = None
+_movie_index = None
+_positions = None
+
+
+def read_parallel(directory, workers=None, chunk_size=CHUNK_SIZE):
+    """
+    Parses the CSV files of directory across worker processes.
+
+    people.csv and movies.csv are parsed concurrently, then stars.csv is
+    streamed in chunks of about chunk_size bytes and resolved to indexes.
+
+    Returns (person_rows, movie_rows, edge_people, edge_movies, skipped):
+    the (id, name, birth) and (id, title, year) rows in file order, two
+    parallel arrays of (person, movie) indexes into the lists of unique
+    ids in that order, and the number of star rows naming an unknown
+    person or movie.
+    """
+    workers = workers or os.cpu_count() or 1
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        people_future = executor.submit(_read_rows, f"{directory}/people.csv", ("id", "name", "birth"))
+        movies_future = executor.submit(_read_rows, f"{directory}/movies.csv", ("id", "title", "year"))
+        person_rows = people_future.result()
+        movie_rows = movies_future.result()
+
+    person_index = _index(person_rows)
+    movie_index = _index(movie_rows)
+
+    edge_people = array("i")
+    edge_movies = array("i")
+    skipped = 0
+    path = f"{directory}/stars.csv"
+    header, chunks = _chunks(path, chunk_size)
+    positions = (header.index("person_id"), header.index("movie_id"))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(person_index, movie_index, positions)) as executor:
+        for chunk_people, chunk_movies, chunk_skipped in executor.map(_read_stars, [path] * len(chunks), chunks):
+            edge_people.extend(chunk_people)
+            edge_movies.extend(chunk_movies)
+            skipped += chunk_skipped
+
+    return person_rows, movie_rows, edge_people, edge_movies, skipped
+
+
+def _read_rows(path, columns):
+    """
+    Returns the given columns of every row of a CSV file as tuples.
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        positions = [header.index(column) for column in columns]
+        return [tuple(row[i] for i in positions) for row in reader]
+
+
+def _index(rows):
+    """
+    Maps the first column of rows to dense indexes in order of first appearance.
+    """
+    index = {}
+    for row in rows:
+        index.setdefault(row[0], len(index))
+    return index
+
+
+def _chunks(path, chunk_size):
+    """
+    Splits the body of a CSV file into (start, end) byte ranges of
+    about chunk_size bytes that end on line boundaries.
+
+    Returns the header columns and the list of ranges.
+    """
+    chunks = []
+    with open(path, "rb") as f:
+        header = next(csv.reader([f.readline().decode("utf-8-sig")]))
+        start = f.tell()
+        size = os.fstat(f.fileno()).st_size
+        while start < size:
+            f.seek(min(start + chunk_size, size))
+            f.readline()
+            end = min(f.tell(), size)
+            chunks.append((start, end))
+            start = end
+    return header, chunks
+
+
+def _init_worker(person_index, movie_index, positions):
+    global _person_index, _movie_index, _positions
+    _person_index = person_index
+    _movie_index = movie_index
+    _positions = positions
+
+
+def _read_stars(path, chunk):
+    """
+    Resolves the star rows in the byte range chunk of stars.csv.
+
+    Returns the person and movie index arrays and the number of
+    rows that were skipped because they named an unknown id.
+    """
+    start, end = chunk
+    with open(path, "rb") as f:
+        f.seek(start)
+        text = f.read(end - start).decode("utf-8")
+
+    edge_people = array("i")
+    edge_movies = array("i")
+    skipped = 0
+    person_position, movie_position = _positions
+    for row in csv.reader(io.StringIO(text)):
+        if not row:
+            continue
+        person = _person_index.get(row[person_position])
+        movie = _movie_index.get(row[movie_position])
+        if person is None or movie is None:
+            skipped += 1
+            continue
+        edge_people.append(person)
+        edge_movies.append(movie)
+    return edge_people, edge_movies, skipped
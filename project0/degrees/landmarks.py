@@ -0,0 +1,268 @@
+import heapq
+from array import array
+
+# Number of landmarks picked by Landmarks.build when none are given
+LANDMARKS = 16
+
+# Share of people, best connected first, Landmarks.build picks landmarks from
+CANDIDATES = 1 / 3
+
+
+class Landmarks():
+    """
+    Distance oracle over a CompactGraph (ALT).
+
+    Holds the breadth first distance from a few landmark people to every
+    person. By the triangle inequality, for any landmark L the distance
+    between a and b is at least |d(L, a) - d(L, b)| and at most
+    d(L, a) + d(L, b), which bounds separations without searching and
+    gives an admissible heuristic for A*.
+    """
+
+    def __init__(self, graph, landmarks, distances):
+        self.graph = graph
+        self.landmarks = landmarks
+        self.distances = distances
+
+    @classmethod
+    def build(cls, graph, count=LANDMARKS, landmarks=None):
+        """
+        Runs a full breadth first search from every landmark.
+
+        landmarks is a list of person indexes; if None, count landmarks
+        are spread out over the best connected CANDIDATES of people.
+        """
+        if landmarks is None:
+            candidates = _highest_degree(graph, max(count, int(len(graph.person_ids) * CANDIDATES)))
+            landmarks, distances = _farthest(graph, count, candidates)
+        else:
+            distances = [_distances(graph, landmark) for landmark in landmarks]
+        return cls(graph, list(landmarks), distances)
+
+    def index_bounds(self, source, target):
+        """
+        Returns (lower, upper) bounds on the separation between two
+        person indexes. upper is None if no landmark reaches both.
+
+        Returns None if a landmark reaches only one of them,
+        which proves they are not connected.
+        """
+        lower = 0
+        upper = None
+        for distance in self.distances:
+            d_source = distance[source]
+            d_target = distance[target]
+            if d_source == -1 and d_target == -1:
+                continue
+            if d_source == -1 or d_target == -1:
+                return None
+            lower = max(lower, abs(d_source - d_target))
+            if upper is None or d_source + d_target < upper:
+                upper = d_source + d_target
+        return lower, upper
+
+    def bounds(self, source, target):
+        """
+        Returns (lower, upper) bounds on the degrees of separation
+        between two person_ids, or None if they are not connected.
+        """
+        index = self.graph.person_index
+        return self.index_bounds(index[source], index[target])
+
+    def separation(self, source, target):
+        """
+        Returns the degrees of separation between two person_ids,
+        or None if they are not connected.
+
+        Answers from the landmark bounds alone when they meet,
+        and falls back to a goal directed search otherwise.
+        """
+        if source == target:
+            return 0
+        bounds = self.bounds(source, target)
+        if bounds is None:
+            return None
+        lower, upper = bounds
+        if lower == upper:
+            return lower
+        path = self.shortest_path(source, target)
+        return None if path is None else len(path)
+
+    def shortest_path(self, source, target, allowed=None, stats=None):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target, or None.
+
+        allowed is an optional movie mask, as in CompactGraph.neighbors,
+        and stats an optional SearchStats to count the search in.
+        """
+        index = self.graph.person_index
+        path = self.search(index[source], index[target], allowed, stats)
+        return None if path is None else self.graph.path_ids(path)
+
+    def search(self, source, target, allowed=None, stats=None):
+        """
+        A* search between two person indexes guided by the landmark
+        lower bounds. Returns (movie, person) index pairs or None.
+
+        Leaving movies out can only make people further apart, so the
+        bounds still hold when searching only the allowed movies.
+        """
+        if source == target:
+            return []
+        graph = self.graph
+        if graph.components is not None and graph.components[source] != graph.components[target]:
+            return None
+        if self.index_bounds(source, target) is None:
+            return None
+
+        neighbors = graph.neighbors if stats is None else stats.counted(graph.neighbors)
+        targets = [distance[target] for distance in self.distances]
+        parents = array("i", [-1]) * len(graph.person_ids)
+        actions = array("i", [-1]) * len(graph.person_ids)
+        costs = {source: 0}
+        parents[source] = source
+
+        # entries are (estimate, -cost, person) so ties go to the deeper person
+        frontier = [(self._estimate(source, target, targets), 0, source)]
+        closed = set()
+        while frontier:
+            if stats is not None:
+                stats.frontier(len(frontier))
+                stats.reached = len(costs) - 1
+
+            # every path still to be found is at least as long as the lowest
+            # estimate in the frontier, so a target reached for no more is done
+            if costs.get(target, frontier[0][0] + 1) <= frontier[0][0]:
+                return graph.rebuild_path(target, parents, actions, source)
+
+            _, cost, person = heapq.heappop(frontier)
+            cost = -cost
+            if person in closed:
+                continue
+            if person == target:
+                return graph.rebuild_path(target, parents, actions, source)
+            closed.add(person)
+
+            for movie, neighbor in neighbors(person, allowed):
+                if neighbor in closed or costs.get(neighbor, cost + 2) <= cost + 1:
+                    continue
+                estimate = self._estimate(neighbor, target, targets)
+                if estimate is None:
+                    continue
+                costs[neighbor] = cost + 1
+                parents[neighbor] = person
+                actions[neighbor] = movie
+                heapq.heappush(frontier, (cost + 1 + estimate, -(cost + 1), neighbor))
+
+        if stats is not None:
+            stats.reached = len(costs) - 1
+        return None
+
+    def _estimate(self, person, target, targets):
+        """
+        Returns the landmark lower bound on the distance from person to
+        target, whose landmark distances are targets, or None when a
+        landmark shows the target cannot be reached from person.
+
+        Anyone but the target is at least one step away, so the bound
+        is raised to 1 for them. That keeps it consistent and lets the
+        search stop as soon as the target is reached, like BFS does.
+        """
+        estimate = 0
+        for distance, d_target in zip(self.distances, targets):
+            d_person = distance[person]
+            if d_person == -1 or d_target == -1:
+                if d_person != d_target:
+                    return None
+                continue
+            if d_person > d_target:
+                d_person, d_target = d_target, d_person
+            if d_target - d_person > estimate:
+                estimate = d_target - d_person
+        if estimate == 0 and person != target:
+            return 1
+        return estimate
+
+
+def _highest_degree(graph, count):
+    """
+    Returns the indexes of the count people with the largest sum of
+    cast sizes over their movies, a cheap stand-in for their degree.
+    """
+    degree = [
+        sum(graph.movie_offsets[movie + 1] - graph.movie_offsets[movie]
+            for movie in graph.movies_for(person))
+        for person in range(len(graph.person_ids))
+    ]
+    return heapq.nlargest(count, range(len(degree)), key=degree.__getitem__)
+
+
+def _farthest(graph, count, candidates):
+    """
+    Picks up to count landmarks among the candidate person indexes,
+    each the candidate farthest from every landmark picked before it.
+    The first is the one farthest from the best connected candidate.
+
+    The best connected people all sit in the same dense core, where
+    the distance from one of them is nearly the same for everybody
+    and bounds nothing. Landmarks on different sides of the graph
+    give much tighter bounds.
+
+    Returns the landmarks and their distance arrays.
+    """
+    if count == 0 or not candidates:
+        return [], []
+    landmarks = []
+    distances = []
+
+    # distance from every candidate to the nearest landmark, -1 once
+    # picked or if it is outside the component of the first one
+    seed = _distances(graph, candidates[0])
+    nearest = [seed[candidate] for candidate in candidates]
+    while len(landmarks) < count:
+        farthest = max(range(len(candidates)), key=nearest.__getitem__)
+        if nearest[farthest] <= 0 and landmarks:
+            break
+        landmark = candidates[farthest]
+        distance = _distances(graph, landmark)
+        if not landmarks:
+            nearest = [distance[candidate] for candidate in candidates]
+        else:
+            nearest = [
+                -1 if d == -1 else min(d, distance[candidate])
+                for d, candidate in zip(nearest, candidates)
+            ]
+        nearest[farthest] = -1
+        landmarks.append(landmark)
+        distances.append(distance)
+    return landmarks, distances
+
+
+def _distances(graph, source):
+    """
+    Returns the breadth first distance from the person index source
+    to every person, with -1 for people that cannot be reached.
+    """
+    distance = array("h", [-1]) * len(graph.person_ids)
+    seen_movies = bytearray(len(graph.movie_ids))
+    distance[source] = 0
+
+    layer = [source]
+    depth = 0
+    while layer:
+        depth += 1
+        next_layer = []
+        for person in layer:
+
+            # a movie's cast is only scanned the first time it is reached
+            for movie in graph.movies_for(person):
+                if seen_movies[movie]:
+                    continue
+                seen_movies[movie] = 1
+                for neighbor in graph.stars_for(movie):
+                    if distance[neighbor] == -1:
+                        distance[neighbor] = depth
+                        next_layer.append(neighbor)
+        layer = next_layer
+    return distance
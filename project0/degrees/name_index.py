@@ -0,0 +1,151 @@
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+
+# Number of candidate names returned by NameIndex.search when no limit is given
+LIMIT = 10
+
+# Trigrams shared by more than this fraction of the names, or MIN_COMMON
+# names in a small index, are too common to find candidates with
+COMMON = 0.02
+MIN_COMMON = 1000
+
+# Number of the query's rarest trigrams that candidates are counted over
+RAREST = 5
+
+# Number of candidates scored on all their trigrams for each name returned
+CANDIDATES = 3
+
+# Fuzzy matches scoring below this share too little with the query to be offered
+MIN_SCORE = 0.4
+
+
+class NameIndex():
+    """
+    Prefix and fuzzy search over lowercase names.
+
+    Names are kept in a sorted list, so every name starting with a prefix
+    is one bisect away, and every name is indexed by its trigrams so that
+    misspelled names can be ranked by how many trigrams they share with
+    the query.
+
+    Trigrams point at positions in entries, which never move, so names
+    can be added and removed without rebuilding the index. The number
+    of trigrams of each entry is kept in sizes at the same position.
+    """
+
+    def __init__(self, names):
+        self.names = sorted(names)
+        self.entries = list(self.names)
+        self.positions = {name: position for position, name in enumerate(self.entries)}
+        self.sizes = array("H")
+        self.grams = {}
+        for position, name in enumerate(self.entries):
+            grams = trigrams(name)
+            self.sizes.append(len(grams))
+            for gram in grams:
+                self.grams.setdefault(gram, array("i")).append(position)
+
+    def add(self, name):
+        """
+        Adds a lowercase name to the index.
+        """
+        if name in self.positions:
+            return
+        position = len(self.entries)
+        self.entries.append(name)
+        self.positions[name] = position
+        insort(self.names, name)
+        grams = trigrams(name)
+        self.sizes.append(len(grams))
+        for gram in grams:
+            self.grams.setdefault(gram, array("i")).append(position)
+
+    def remove(self, name):
+        """
+        Removes a lowercase name from the index. Its trigram postings
+        are left behind and skipped once the entry is cleared.
+        """
+        position = self.positions.pop(name, None)
+        if position is None:
+            return
+        self.entries[position] = None
+        del self.names[bisect_left(self.names, name)]
+
+    def prefix(self, prefix, limit=LIMIT):
+        """
+        Returns up to limit names starting with prefix, in order.
+        """
+        prefix = prefix.lower()
+        matches = []
+        position = bisect_left(self.names, prefix)
+        while position < len(self.names) and len(matches) < limit:
+            if not self.names[position].startswith(prefix):
+                break
+            matches.append(self.names[position])
+            position += 1
+        return matches
+
+    def fuzzy(self, query, limit=LIMIT):
+        """
+        Returns up to limit (name, score) pairs ranked by the Dice
+        similarity of their trigrams with those of query.
+
+        Candidates are the names sharing most of the query's RAREST
+        rarest trigrams. Those too short or too long to reach MIN_SCORE
+        are dropped before the rest are scored on all their trigrams.
+        """
+        grams = trigrams(query.lower())
+        postings = sorted(
+            (self.grams[gram] for gram in grams if gram in self.grams),
+            key=len
+        )
+        if not postings:
+            return []
+
+        # count shared trigrams, leaving out the most common ones if others are left
+        common = max(MIN_COMMON, int(COMMON * len(self.positions)))
+        rare = [posting for posting in postings[:RAREST] if len(posting) <= common] or postings[:1]
+        shared = Counter()
+        for posting in rare:
+            shared.update(posting)
+
+        # 2 * shared / (len(grams) + size) can only reach MIN_SCORE for sizes in this range
+        shortest = len(grams) * MIN_SCORE / (2 - MIN_SCORE)
+        longest = len(grams) * (2 - MIN_SCORE) / MIN_SCORE
+
+        scored = []
+        for position, _ in shared.most_common(limit * CANDIDATES):
+            name = self.entries[position]
+            size = self.sizes[position]
+            if name is None or not shortest <= size <= longest:
+                continue
+            score = 2 * len(grams & trigrams(name)) / (len(grams) + size)
+            if score >= MIN_SCORE:
+                scored.append((score, name))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [(name, score) for score, name in scored[:limit]]
+
+    def search(self, query, limit=LIMIT):
+        """
+        Returns up to limit names matching query: the exact name first,
+        then names starting with it, then the closest fuzzy matches.
+        """
+        query = query.lower().strip()
+        matches = self.prefix(query, limit)
+        if len(matches) < limit:
+            for name, _ in self.fuzzy(query, limit):
+                if name not in matches:
+                    matches.append(name)
+                if len(matches) == limit:
+                    break
+        return matches
+
+
+def trigrams(name):
+    """
+    Returns the set of three letter substrings of a name,
+    padded so that its first and last letters are counted.
+    """
+    padded = f"  {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
@@ -0,0 +1,174 @@
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import degrees
+from batch import init_worker, make_query, query_result, share_graph, solve_query
+
+# Socket the server listens on when none is given
+SOCKET = "degrees.sock"
+
+# How search workers are started, never by forking the server itself
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+class DegreesServer():
+    """
+    Keeps the degrees graph resident and answers newline delimited
+    JSON queries over a Unix or TCP socket.
+
+    Requests are objects with an "op" of "person" (with a "name"),
+    "path" (with a "source" and "target" given by id or name) or
+    "stats" for the path cache counters. Any "id"
+    in a request is copied to its response. Each request is handled in
+    its own task and searches run in a process pool, so responses may
+    come back out of order and slow searches never block fast lookups.
+    """
+
+    def __init__(self, workers=None):
+        self.graph = degrees.graph
+        self.memory, layout = share_graph(self.graph)
+
+        # workers are started on the first search, when client sockets are
+        # open, so they must not be forked from this process or they keep
+        # those connections open after the server closes them
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context(START_METHOD),
+            initializer=init_worker, initargs=(layout,)
+        )
+
+    def close(self):
+        self.executor.shutdown()
+        self.memory.close()
+        self.memory.unlink()
+
+    async def serve(self, address):
+        """
+        Serves on a Unix socket path or a "host:port" TCP address
+        until the process gets SIGTERM, then returns so the caller
+        can close the server.
+        """
+        if ":" in address:
+            host, port = address.rsplit(":", 1)
+            server = await asyncio.start_server(self.handle, host, int(port))
+        else:
+            if os.path.exists(address):
+                os.remove(address)
+            server = await asyncio.start_unix_server(self.handle, address)
+        stopped = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        loop.add_signal_handler(signal.SIGTERM, stopped.set)
+        try:
+            async with server:
+                await stopped.wait()
+        finally:
+            loop.remove_signal_handler(signal.SIGTERM)
+
+    async def handle(self, reader, writer):
+        """
+        Answers every request line of one connection.
+        """
+        tasks = set()
+        try:
+            while line := await reader.readline():
+                if not line.strip():
+                    continue
+                task = asyncio.create_task(self.respond(line, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.wait(tasks)
+        finally:
+            writer.close()
+
+    async def respond(self, line, writer):
+        """
+        Answers one request line and writes the response line.
+        """
+        try:
+            request = json.loads(line)
+            response = await self.answer(request)
+            if "id" in request:
+                response["id"] = request["id"]
+        except (ValueError, KeyError, TypeError, AttributeError) as error:
+            response = {"error": f"Bad request: {error}"}
+        writer.write(json.dumps(response).encode("utf-8") + b"\n")
+        await writer.drain()
+
+    async def answer(self, request):
+        """
+        Returns the response for a decoded request.
+        """
+        if request["op"] == "person":
+            return {"people": people_for_name(request["name"])}
+        if request["op"] == "path":
+            return await self.path(request["source"], request["target"])
+        if request["op"] == "stats":
+            return degrees.cache.stats() if degrees.cache is not None else {}
+        return {"error": f"Unknown op: {request['op']}"}
+
+    async def path(self, source, target):
+        """
+        Returns the response for a path query, from degrees.cache
+        when possible and from a search in the pool otherwise.
+        """
+        query = make_query(self.graph, source, target)
+        if degrees.cache is None or query[2] is None or query[3] is None:
+            loop = asyncio.get_running_loop()
+            query, path = await loop.run_in_executor(self.executor, solve_query, query)
+            return query_result(self.graph, query, path)
+
+        source_id = self.graph.person_ids[query[2]]
+        target_id = self.graph.person_ids[query[3]]
+        found, path = degrees.cache.get(source_id, target_id, degrees.data_version)
+        if not found:
+            loop = asyncio.get_running_loop()
+            query, path = await loop.run_in_executor(self.executor, solve_query, query)
+            path = None if path is None else self.graph.path_ids(path)
+            degrees.cache.put(source_id, target_id, path, degrees.data_version)
+
+        result = {"source": source, "target": target}
+        result["degrees"] = None if path is None else len(path)
+        result["path"] = path
+        return result
+
+
+def people_for_name(name):
+    """
+    Returns id, name and birth of every person with a given name,
+    or of the closest matches from degrees.name_index if there is none.
+    """
+    matches = [name.lower()] if name.lower() in degrees.names else degrees.index_names().search(name)
+    return [
+        {"id": person_id, "name": degrees.people[person_id]["name"], "birth": degrees.people[person_id]["birth"]}
+        for match in matches
+        for person_id in sorted(degrees.names[match])
+    ]
+
+
+def main():
+    if len(sys.argv) not in (2, 3, 4):
+        sys.exit("Usage: python server.py directory [socket | host:port] [workers]")
+    directory = sys.argv[1]
+    address = sys.argv[2] if len(sys.argv) >= 3 else SOCKET
+    workers = int(sys.argv[3]) if len(sys.argv) == 4 else None
+
+    print("Loading data...")
+    degrees.load_data(directory, compact=True, snapshot=True)
+    print(f"Serving on {address}")
+
+    server = DegreesServer(workers)
+    try:
+        asyncio.run(server.serve(address))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+import json
+import mmap
+import os
+import sys
+from array import array
+
+from graph import CompactGraph
+
+MAGIC = b"DEGSNAP2"
+FILENAME = "degrees.snapshot"
+SOURCES = ("people.csv", "movies.csv", "stars.csv")
+
+# Order of the integer arrays and string columns inside a snapshot
+ARRAYS = ("person_offsets", "person_movies", "movie_offsets", "movie_people", "components")
+COLUMNS = ("person_ids", "person_names", "births", "movie_ids", "titles", "years")
+
+
+def snapshot_path(directory):
+    """
+    Returns the path of the snapshot file for a data directory.
+    """
+    return os.path.join(directory, FILENAME)
+
+
+def source_stats(directory):
+    """
+    Returns the size and mtime of every source CSV, used to
+    tell whether a snapshot still matches the data it came from.
+    """
+    stats = {}
+    for name in SOURCES:
+        stat = os.stat(os.path.join(directory, name))
+        stats[name] = [stat.st_size, stat.st_mtime_ns]
+    return stats
+
+
+def write_snapshot(directory, graph, columns, skipped=0):
+    """
+    Writes graph, the string columns (a dict keyed by COLUMNS) and the
+    number of star rows skipped while loading to the snapshot file of directory.
+    """
+    blobs = [
+        array("i", getattr(graph, name)).tobytes()
+        for name in ARRAYS
+    ] + [
+        "\0".join(columns[name]).encode("utf-8")
+        for name in COLUMNS
+    ]
+
+    # sections are 8 byte aligned so arrays can be cast in place
+    sections = []
+    offset = 0
+    for blob in blobs:
+        sections.append([offset, len(blob)])
+        offset += _padded(len(blob))
+
+    header = json.dumps({
+        "sources": source_stats(directory),
+        "byteorder": sys.byteorder,
+        "itemsize": array("i").itemsize,
+        "people": len(graph.person_ids),
+        "movies": len(graph.movie_ids),
+        "skipped": skipped,
+        "sections": sections
+    }).encode("utf-8")
+    header += b" " * (_padded(len(header) + 12) - len(header) - 12)
+
+    path = snapshot_path(directory)
+    with open(path + ".tmp", "wb") as f:
+        f.write(MAGIC)
+        f.write(len(header).to_bytes(4, "little"))
+        f.write(header)
+        for blob in blobs:
+            f.write(blob)
+            f.write(b"\0" * (_padded(len(blob)) - len(blob)))
+    os.replace(path + ".tmp", path)
+
+
+def read_snapshot(directory):
+    """
+    Memory maps the snapshot of directory.
+
+    Returns (graph, columns, skipped) where the graph arrays are views
+    over the mapped file, or None if there is no snapshot, it no longer
+    matches the source CSVs or it is damaged.
+    """
+    mapped = _map(directory)
+    if mapped is None:
+        return None
+    data, header, start = mapped
+
+    view = memoryview(data)
+    sections = [view[start + offset:start + offset + length]
+                for offset, length in header["sections"]]
+
+    arrays = [section.cast("i") for section in sections[:len(ARRAYS)]]
+    columns = {}
+    for name, section, count in zip(COLUMNS, sections[len(ARRAYS):], _counts(header)):
+        try:
+            values = str(section, "utf-8").split("\0")
+        except UnicodeDecodeError:
+            return None
+        columns[name] = values if count else []
+        if len(columns[name]) != count:
+            return None
+
+    # every offset must point inside the arrays it indexes
+    people, movies = header["people"], header["movies"]
+    lengths = [len(array) for array in arrays]
+    if (lengths != [people + 1, lengths[1], movies + 1, lengths[1], people]
+            or arrays[0][0] != 0 or arrays[0][-1] != lengths[1]
+            or arrays[2][0] != 0 or arrays[2][-1] != lengths[1]):
+        return None
+
+    graph = CompactGraph(columns["person_ids"], columns["movie_ids"], *arrays)
+    return graph, columns, header["skipped"]
+
+
+def snapshot_skipped(directory):
+    """
+    Returns the number of skipped star rows recorded in the snapshot
+    of directory, or None if it has no up to date snapshot.
+    """
+    mapped = _map(directory)
+    return None if mapped is None else mapped[1]["skipped"]
+
+
+def _map(directory):
+    """
+    Memory maps the snapshot of directory and checks its header.
+
+    Returns the mapping, the decoded header and the offset where the
+    sections start, or None if the snapshot is missing, out of date
+    or damaged, as the snapshot is only a cache of the CSVs.
+    """
+    path = snapshot_path(directory)
+    try:
+        with open(path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    if data[:len(MAGIC)] != MAGIC or len(data) < 12:
+        return None
+    size = int.from_bytes(data[8:12], "little")
+    try:
+        header = json.loads(data[12:12 + size])
+        if (header["sources"] != source_stats(directory)
+                or header["byteorder"] != sys.byteorder
+                or header["itemsize"] != array("i").itemsize):
+            return None
+        sections = header["sections"]
+        valid = (
+            len(sections) == len(ARRAYS) + len(COLUMNS)
+            and all(0 <= offset and 0 <= length and 12 + size + offset + length <= len(data)
+                    for offset, length in sections)
+            and all(length % header["itemsize"] == 0 for _, length in sections[:len(ARRAYS)])
+            and all(count >= 0 for count in _counts(header))
+            and isinstance(header["skipped"], int)
+        )
+    except (ValueError, KeyError, TypeError):
+        return None
+    if not valid:
+        return None
+    return data, header, 12 + size
+
+
+def _counts(header):
+    """
+    Returns the number of entries expected in each string column.
+    """
+    return [header["people"]] * 3 + [header["movies"]] * 3
+
+
+def _padded(length):
+    """
+    Rounds length up to a multiple of 8.
+    """
+    return (length + 7) // 8 * 8
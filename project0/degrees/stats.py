@@ -0,0 +1,87 @@
+import time
+from contextlib import contextmanager, nullcontext
+
+
+class SearchStats():
+    """
+    Counters filled in by a search that is given one.
+
+    expanded counts the nodes whose neighbors were asked for, generated
+    the neighbors returned, reached the generated nodes that were new to
+    the search and peak_frontier the most nodes waiting to be expanded
+    at once. phases maps a phase name to the seconds spent in it.
+
+    If hook is given it is called with the stats when the search is
+    done, e.g. to send them on to a metrics system.
+    """
+
+    def __init__(self, hook=None):
+        self.hook = hook
+        self.expanded = 0
+        self.generated = 0
+        self.reached = 0
+        self.peak_frontier = 0
+        self.phases = {}
+
+    @property
+    def duplicate_rate(self):
+        """
+        Fraction of generated neighbors that had already been reached.
+        """
+        if self.generated == 0:
+            return 0.0
+        return max(self.generated - self.reached, 0) / self.generated
+
+    def counted(self, neighbors):
+        """
+        Wraps a neighbors function so that every call counts one
+        expanded node and every neighbor it returns one generated node.
+        """
+        def counting(*args):
+            self.expanded += 1
+            for neighbor in neighbors(*args):
+                self.generated += 1
+                yield neighbor
+        return counting
+
+    def frontier(self, size):
+        """
+        Records the current size of the frontier.
+        """
+        if size > self.peak_frontier:
+            self.peak_frontier = size
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Adds the wall clock time spent in the with block to phases[name].
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def done(self):
+        """
+        Calls the hook, if any, once the search has finished.
+        """
+        if self.hook is not None:
+            self.hook(self)
+
+    def as_dict(self):
+        return {
+            "expanded": self.expanded,
+            "generated": self.generated,
+            "reached": self.reached,
+            "peak_frontier": self.peak_frontier,
+            "duplicate_rate": self.duplicate_rate,
+            "phases": dict(self.phases)
+        }
+
+
+def phase(stats, name):
+    """
+    Returns stats.phase(name), or a context that does nothing without stats.
+    """
+    return nullcontext() if stats is None else stats.phase(name)
@@ -0,0 +1,341 @@
+import csv
+import json
+import os
+import sqlite3
+import sys
+from collections.abc import Mapping, Set
+from itertools import groupby
+
+from components import label_components
+from name_index import LIMIT
+from snapshot import source_stats
+
+# Database file used for a data directory when none is given
+FILENAME = "degrees.sqlite"
+
+# Size of SQLite's page cache in KiB, the bound on the memory a store keeps
+PAGE_CACHE = 64 * 1024
+
+# Number of people looked up per neighbor query, below SQLite's parameter limit
+BATCH = 500
+
+# Version of SCHEMA, databases imported with another one are imported again
+VERSION = 2
+
+# Release years open ended year ranges are bounded by
+EARLIEST = -sys.maxsize - 1
+LATEST = sys.maxsize
+
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE people (id TEXT UNIQUE, name TEXT, key TEXT, birth TEXT, component INTEGER);
+CREATE TABLE movies (id TEXT PRIMARY KEY, title TEXT, year TEXT, released INTEGER) WITHOUT ROWID;
+CREATE TABLE stars (person_id TEXT, movie_id TEXT, PRIMARY KEY (person_id, movie_id)) WITHOUT ROWID;
+CREATE TEMP TABLE raw_stars (person_id TEXT, movie_id TEXT);
+"""
+
+INDEXES = """
+CREATE INDEX people_key ON people (key);
+CREATE INDEX stars_movie ON stars (movie_id, person_id);
+CREATE INDEX movies_released ON movies (released);
+"""
+
+
+class SqliteStore():
+    """
+    Out of core copy of a data directory in an indexed SQLite database.
+
+    people, movies and names are read only views with the same keys
+    and entries as the dictionaries of degrees.load_data, so code
+    written against those works unchanged. Only SQLite's page cache,
+    bounded by PAGE_CACHE, is kept in memory.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        meta = dict(connection.execute("SELECT key, value FROM meta"))
+        self.skipped = int(meta["skipped"])
+        self.component_count = int(meta["components"])
+        self.people = PeopleView(connection)
+        self.movies = MoviesView(connection)
+        self.names = NamesView(connection)
+
+    @classmethod
+    def open(cls, directory, database=None):
+        """
+        Opens the database of directory, importing the CSVs
+        first if it is missing or older than them.
+        """
+        if database is None:
+            database = os.path.join(directory, FILENAME)
+        if not _is_current(directory, database):
+            import_csv(directory, database)
+        connection = sqlite3.connect(database, check_same_thread=False)
+        connection.execute(f"PRAGMA cache_size = -{PAGE_CACHE}")
+        connection.execute("PRAGMA query_only = ON")
+
+        # keys are lowercase already, and LIKE can only use their index case sensitively
+        connection.execute("PRAGMA case_sensitive_like = ON")
+        return cls(connection)
+
+    def close(self):
+        self.connection.close()
+
+    def neighbors_for_person(self, person_id, allowed=None):
+        """
+        Returns (movie_id, person_id) pairs for people
+        who starred with a given person.
+        """
+        return self.neighbors_for_people([person_id], allowed)[person_id]
+
+    def neighbors_for_people(self, person_ids, allowed=None):
+        """
+        Returns a dictionary mapping each of person_ids to its
+        (movie_id, person_id) neighbor pairs, fetched in batches of
+        BATCH people per query. allowed is an optional set of movie_ids,
+        or a MovieFilterView whose year range is checked in the query.
+        """
+        query = (
+            "SELECT a.person_id, b.movie_id, b.person_id FROM stars a "
+            "JOIN stars b ON b.movie_id = a.movie_id "
+        )
+        years = ()
+        if isinstance(allowed, MovieFilterView):
+            if allowed.years is not None:
+                query += "JOIN movies ON movies.id = a.movie_id AND movies.released BETWEEN ? AND ? "
+                years = allowed.years
+            allowed = allowed if allowed.listed else None
+
+        neighbors = {person_id: set() for person_id in person_ids}
+        person_ids = list(neighbors)
+        for start in range(0, len(person_ids), BATCH):
+            batch = person_ids[start:start + BATCH]
+            rows = self.connection.execute(
+                query + f"WHERE a.person_id IN ({', '.join('?' * len(batch))})",
+                (*years, *batch)
+            )
+            for person_id, movie_id, star_id in rows:
+                if allowed is None or movie_id in allowed:
+                    neighbors[person_id].add((movie_id, star_id))
+        return neighbors
+
+    def movie_filter(self, years=None, allow=None, deny=None):
+        """
+        Returns a MovieFilterView of the movies passing a
+        degrees.movie_filter with the same arguments.
+        """
+        return MovieFilterView(self.connection, years, allow, deny)
+
+
+class MovieFilterView(Set):
+    """
+    Set view of the movie_ids of a store a filtered search may go through.
+
+    The year range is checked in SQL against the indexed release year
+    and only the allow and deny sets are held in memory, so no set of
+    every movie is built. listed is False if there are neither.
+    """
+
+    def __init__(self, connection, years=None, allow=None, deny=None):
+        self.connection = connection
+        if years is not None:
+            first, last = years
+            years = (EARLIEST if first is None else first, LATEST if last is None else last)
+        self.years = years
+        self.allow = None if allow is None else set(allow)
+        self.deny = set() if deny is None else set(deny)
+        self.listed = self.allow is not None or bool(self.deny)
+
+    def __contains__(self, movie_id):
+        if self.allow is not None and movie_id not in self.allow or movie_id in self.deny:
+            return False
+        if self.years is None:
+            row = self.connection.execute("SELECT 1 FROM movies WHERE id = ?", (movie_id,)).fetchone()
+        else:
+            row = self.connection.execute(
+                "SELECT 1 FROM movies WHERE id = ? AND released BETWEEN ? AND ?", (movie_id, *self.years)
+            ).fetchone()
+        return row is not None
+
+    def __iter__(self):
+        if self.allow is not None:
+            return (movie_id for movie_id in self.allow if movie_id in self)
+        if self.years is None:
+            rows = self.connection.execute("SELECT id FROM movies")
+        else:
+            rows = self.connection.execute("SELECT id FROM movies WHERE released BETWEEN ? AND ?", self.years)
+        return (row[0] for row in rows if row[0] not in self.deny)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+class PeopleView(Mapping):
+    """
+    person_id -> {"name", "birth", "component"} view of a store.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __getitem__(self, person_id):
+        row = self.connection.execute(
+            "SELECT name, birth, component FROM people WHERE id = ?", (person_id,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(person_id)
+        return {"name": row[0], "birth": row[1], "component": row[2]}
+
+    def __iter__(self):
+        return (row[0] for row in self.connection.execute("SELECT id FROM people"))
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM people").fetchone()[0]
+
+
+class MoviesView(Mapping):
+    """
+    movie_id -> {"title", "year"} view of a store.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __getitem__(self, movie_id):
+        row = self.connection.execute(
+            "SELECT title, year FROM movies WHERE id = ?", (movie_id,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(movie_id)
+        return {"title": row[0], "year": row[1]}
+
+    def __iter__(self):
+        return (row[0] for row in self.connection.execute("SELECT id FROM movies"))
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM movies").fetchone()[0]
+
+
+class NamesView(Mapping):
+    """
+    Lowercase name -> set of person_ids view of a store.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __getitem__(self, name):
+        person_ids = {
+            row[0] for row in self.connection.execute("SELECT id FROM people WHERE key = ?", (name,))
+        }
+        if not person_ids:
+            raise KeyError(name)
+        return person_ids
+
+    def __iter__(self):
+        return (row[0] for row in self.connection.execute("SELECT DISTINCT key FROM people"))
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(DISTINCT key) FROM people").fetchone()[0]
+
+    def search(self, query, limit=LIMIT):
+        """
+        Returns up to limit names starting with query, in order, as
+        NameIndex.search does for names in memory. Misspelled names
+        are matched by the longest start of query some names share.
+        """
+        query = query.lower().strip()
+        for end in range(len(query), 0, -1):
+            prefix = query[:end].replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            matches = [row[0] for row in self.connection.execute(
+                "SELECT DISTINCT key FROM people WHERE key LIKE ? ESCAPE '\\' ORDER BY key LIMIT ?",
+                (prefix + "%", limit)
+            )]
+            if matches:
+                return matches
+        return []
+
+
+def import_csv(directory, database):
+    """
+    Imports the CSVs of directory into a new database, streaming
+    the rows so that the data never has to fit in memory.
+
+    Star rows naming an unknown person or movie are counted and left
+    out, and every person is labelled with its connected component.
+    """
+    if os.path.exists(database):
+        os.remove(database)
+    connection = sqlite3.connect(database)
+    connection.executescript(SCHEMA)
+
+    with connection:
+        with open(f"{directory}/people.csv", encoding="utf-8") as f:
+            connection.executemany(
+                "INSERT OR REPLACE INTO people (id, name, key, birth) VALUES (?, ?, ?, ?)",
+                ((row["id"], row["name"], row["name"].lower(), row["birth"]) for row in csv.DictReader(f))
+            )
+        with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+            connection.executemany(
+                "INSERT OR REPLACE INTO movies (id, title, year, released) VALUES (?, ?, ?, ?)",
+                (
+                    (row["id"], row["title"], row["year"], int(row["year"]) if row["year"].isdigit() else None)
+                    for row in csv.DictReader(f)
+                )
+            )
+        with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+            connection.executemany(
+                "INSERT INTO raw_stars (person_id, movie_id) VALUES (?, ?)",
+                ((row["person_id"], row["movie_id"]) for row in csv.DictReader(f))
+            )
+
+        # Count and leave out star rows that name an unknown person or movie
+        known = (
+            "EXISTS (SELECT 1 FROM people WHERE id = raw_stars.person_id) "
+            "AND EXISTS (SELECT 1 FROM movies WHERE id = raw_stars.movie_id)"
+        )
+        skipped = connection.execute(f"SELECT COUNT(*) FROM raw_stars WHERE NOT ({known})").fetchone()[0]
+        connection.execute(f"INSERT OR IGNORE INTO stars SELECT person_id, movie_id FROM raw_stars WHERE {known}")
+        connection.execute("DROP TABLE raw_stars")
+        connection.executescript(INDEXES)
+
+        # Label components by person rowid, walking the casts one movie at a time
+        count = connection.execute("SELECT COALESCE(MAX(rowid), 0) + 1 FROM people").fetchone()[0]
+        rows = connection.execute(
+            "SELECT stars.movie_id, people.rowid FROM stars "
+            "JOIN people ON people.id = stars.person_id ORDER BY stars.movie_id"
+        )
+        labels = label_components(
+            count,
+            ([person for _, person in cast] for _, cast in groupby(rows, key=lambda row: row[0]))
+        )
+        connection.executemany(
+            "UPDATE people SET component = ? WHERE rowid = ?",
+            ((labels[rowid], rowid) for rowid in range(1, count))
+        )
+
+        connection.executemany("INSERT INTO meta (key, value) VALUES (?, ?)", [
+            ("version", str(VERSION)),
+            ("sources", json.dumps(source_stats(directory))),
+            ("skipped", str(skipped)),
+            ("components", str(max(labels, default=-1) + 1))
+        ])
+    connection.close()
+
+
+def _is_current(directory, database):
+    """
+    Returns True if database was imported from the CSVs as they are
+    now, with the current SCHEMA.
+    """
+    if not os.path.exists(database):
+        return False
+    try:
+        connection = sqlite3.connect(database)
+        try:
+            meta = dict(connection.execute("SELECT key, value FROM meta WHERE key IN ('version', 'sources')"))
+        finally:
+            connection.close()
+    except sqlite3.DatabaseError:
+        return False
+    return meta.get("version") == str(VERSION) and json.loads(meta.get("sources", "null")) == source_stats(directory)
@@ -0,0 +1,50 @@
+import csv
+import os
+import shutil
+
+import pytest
+
+import degrees
+
+SMALL = os.path.join(os.path.dirname(__file__), "small")
+
+
+def remove_person(directory, person_id):
+    """
+    Rewrites people.csv and stars.csv of directory without person_id.
+    """
+    for filename, column in (("people.csv", "id"), ("stars.csv", "person_id")):
+        with open(f"{directory}/{filename}", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            fields = reader.fieldnames
+            rows = [row for row in reader if row[column] != person_id]
+        with open(f"{directory}/{filename}", "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fields)
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+@pytest.fixture
+def directory(tmp_path):
+    for filename in ("people.csv", "movies.csv", "stars.csv"):
+        shutil.copy(f"{SMALL}/{filename}", tmp_path)
+    return str(tmp_path)
+
+
+@pytest.mark.parametrize("options", [{}, {"compact": True}, {"snapshot": True}, {"compact": True, "snapshot": True}])
+def test_reload_changed_directory(directory, options):
+    degrees.load_data(directory, **options)
+    assert degrees.shortest_path("102", "158") is not None
+
+    remove_person(directory, "158")
+    degrees.load_data(directory, **options)
+    assert "158" not in degrees.people
+    assert "tom hanks" not in degrees.names
+    assert all("158" not in movie.get("stars", ()) for movie in degrees.movies.values())
+
+
+def test_plain_load_after_compact_load(directory):
+    degrees.load_data(directory, compact=True)
+    degrees.load_data(directory)
+    assert degrees.graph is None
+    assert len(degrees.shortest_path("102", "158")) == 1
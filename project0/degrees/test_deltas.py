@@ -0,0 +1,136 @@
+import csv
+import os
+import random
+
+import pytest
+
+import degrees
+from deltas import apply_delta
+from generate import generate
+from snapshot import read_snapshot
+
+
+@pytest.fixture
+def directory(tmp_path):
+    directory = str(tmp_path / "data")
+    generate(directory, 3000, seed=3)
+    return directory
+
+
+def read_rows(path):
+    with open(path, encoding="utf-8") as f:
+        reader = csv.reader(f)
+        next(reader)
+        return [tuple(row) for row in reader]
+
+
+def write_rows(path, header, rows):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def make_delta(directory, delta_directory, edited_directory, seed=0):
+    """
+    Writes a random delta over the data in directory to delta_directory
+    and the CSVs with that delta applied by hand to edited_directory.
+    """
+    rng = random.Random(seed)
+    people = {row[0]: row[1:] for row in read_rows(os.path.join(directory, "people.csv"))}
+    movies = {row[0]: row[1:] for row in read_rows(os.path.join(directory, "movies.csv"))}
+    stars = dict.fromkeys(read_rows(os.path.join(directory, "stars.csv")))
+
+    remove_stars = rng.sample(sorted(stars), len(stars) // 10) + [("nobody", "nothing")]
+    remove_movies = rng.sample(sorted(movies), 20)
+    remove_people = rng.sample(sorted(people), 30)
+    add_people = [(person_id, f"Readded {person_id}", "1999") for person_id in remove_people[:5]]
+    add_people += [(f"n{i}", f"New Person {i}", "2000") for i in range(3)] + [("102", "Duplicate", "1958")]
+    add_movies = [("m0", "New Movie", "2020"), ("m1", "Newer Movie", "2021")]
+    person_ids = sorted(people) + [person_id for person_id, _, _ in add_people]
+    movie_ids = sorted(movies) + [movie_id for movie_id, _, _ in add_movies]
+    add_stars = [(rng.choice(person_ids), rng.choice(movie_ids)) for _ in range(150)]
+
+    os.makedirs(delta_directory)
+    write_rows(
+        os.path.join(delta_directory, "stars.csv"), ["op", "person_id", "movie_id"],
+        [("remove", *star) for star in remove_stars] + [("add", *star) for star in add_stars]
+    )
+    write_rows(
+        os.path.join(delta_directory, "movies.csv"), ["op", "id", "title", "year"],
+        [("remove", movie_id, "", "") for movie_id in remove_movies] + [("add", *row) for row in add_movies]
+    )
+    write_rows(
+        os.path.join(delta_directory, "people.csv"), ["op", "id", "name", "birth"],
+        [("remove", person_id, "", "") for person_id in remove_people] + [("add", *row) for row in add_people]
+    )
+
+    # removals first, dropping the credits of removed people and movies, then additions
+    for star in remove_stars:
+        stars.pop(star, None)
+    for movie_id in remove_movies:
+        del movies[movie_id]
+    for person_id in remove_people:
+        del people[person_id]
+    stars = {star: None for star in stars if star[0] in people and star[1] in movies}
+    for person_id, name, birth in add_people:
+        people.setdefault(person_id, (name, birth))
+    for movie_id, title, year in add_movies:
+        movies[movie_id] = (title, year)
+    for star in add_stars:
+        if star[0] in people and star[1] in movies:
+            stars[star] = None
+
+    os.makedirs(edited_directory)
+    write_rows(os.path.join(edited_directory, "people.csv"), ["id", "name", "birth"],
+               [(person_id, *row) for person_id, row in people.items()])
+    write_rows(os.path.join(edited_directory, "movies.csv"), ["id", "title", "year"],
+               [(movie_id, *row) for movie_id, row in movies.items()])
+    write_rows(os.path.join(edited_directory, "stars.csv"), ["person_id", "movie_id"], stars)
+
+
+def loaded_state():
+    """
+    Returns the loaded data in a form that does not depend on its
+    representation or on the order it was loaded in.
+    """
+    if degrees.graph is not None:
+        def component(person_id):
+            return degrees.graph.components[degrees.graph.person_index[person_id]]
+    else:
+        def component(person_id):
+            return degrees.people[person_id]["component"]
+
+    components = {}
+    for person_id in degrees.people:
+        components.setdefault(component(person_id), set()).add(person_id)
+    return {
+        "people": {person_id: (person["name"], person["birth"]) for person_id, person in degrees.people.items()},
+        "movies": {movie_id: (movie["title"], movie["year"]) for movie_id, movie in degrees.movies.items()},
+        "adjacency": {person_id: degrees.neighbors_for_person(person_id) for person_id in degrees.people},
+        "components": {frozenset(people) for people in components.values()},
+        "names": {name: set(person_ids) for name, person_ids in degrees.names.items()},
+        "years": {year: set(movie_ids) for year, movie_ids in degrees.movies_by_year.items()}
+    }
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_delta_matches_reloading_edited_csvs(directory, tmp_path, compact):
+    delta_directory = str(tmp_path / "delta")
+    edited_directory = str(tmp_path / "edited")
+    make_delta(directory, delta_directory, edited_directory)
+
+    degrees.load_data(edited_directory, compact=compact)
+    expected = loaded_state()
+
+    degrees.load_data(directory, compact=compact, snapshot=True)
+    degrees.index_names()
+    skipped = apply_delta(delta_directory, directory)
+    assert skipped > 0
+    assert loaded_state() == expected
+    assert set(degrees.name_index.names) == set(degrees.names)
+
+    # the snapshot was rewritten with the delta applied
+    assert read_snapshot(directory) is not None
+    degrees.load_data(directory, compact=compact, snapshot=True)
+    assert loaded_state() == expected
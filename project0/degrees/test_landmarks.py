@@ -0,0 +1,63 @@
+import random
+
+import pytest
+
+import degrees
+from generate import generate
+from graph import CompactGraph
+from landmarks import Landmarks
+from stats import SearchStats
+
+PAIRS = 50
+
+
+@pytest.fixture(scope="module")
+def graph(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("generated")
+    generate(str(directory), 20000, seed=1)
+    degrees.load_data(str(directory), compact=True)
+    return degrees.graph
+
+
+def connected_pairs(graph, count, seed=0):
+    rng = random.Random(seed)
+    people = len(graph.person_ids)
+    pairs = []
+    while len(pairs) < count:
+        source, target = rng.randrange(people), rng.randrange(people)
+        if source != target and graph.components[source] == graph.components[target]:
+            pairs.append((source, target))
+    return pairs
+
+
+def test_landmarks_are_spread_out(graph):
+    landmarks = Landmarks.build(graph)
+    for i, landmark in enumerate(landmarks.landmarks):
+        for other in landmarks.landmarks[:i]:
+            assert landmarks.distances[i][other] > 1
+
+
+def test_search_expands_fewer_people_than_bfs(graph):
+    landmarks = Landmarks.build(graph)
+    bfs_expanded = 0
+    astar_expanded = 0
+    for source, target in connected_pairs(graph, PAIRS):
+        bfs_stats = SearchStats()
+        astar_stats = SearchStats()
+        path = graph.breadth_first_path(source, target, bfs_stats)
+        assert len(landmarks.search(source, target, stats=astar_stats)) == len(path)
+        bfs_expanded += bfs_stats.expanded
+        astar_expanded += astar_stats.expanded
+    assert astar_expanded < 0.6 * bfs_expanded
+
+
+def test_search_on_tiny_graph():
+    graph = CompactGraph.from_data(
+        {"1": {}, "2": {}, "3": {}, "4": {}},
+        {"10": {"stars": {"1", "2"}}, "20": {"stars": {"2", "3"}}, "30": {"stars": {"4"}}}
+    )
+    landmarks = Landmarks.build(graph)
+    index = graph.person_index
+    assert landmarks.separation("1", "3") == 2
+    assert landmarks.separation("1", "4") is None
+    assert len(landmarks.search(index["1"], index["3"])) == 2
@@ -0,0 +1,49 @@
+from name_index import NameIndex
+
+NAMES = [
+    "kevin bacon", "kevin costner", "kevin spacey", "kevin kline",
+    "tom cruise", "tom hanks", "tom hardy", "emma watson", "emma stone"
+]
+
+
+def test_prefix_returns_names_in_order():
+    index = NameIndex(NAMES)
+    assert index.prefix("Kevin") == ["kevin bacon", "kevin costner", "kevin kline", "kevin spacey"]
+    assert index.prefix("tom h") == ["tom hanks", "tom hardy"]
+    assert index.prefix("kevin", limit=2) == ["kevin bacon", "kevin costner"]
+    assert index.prefix("zz") == []
+
+
+def test_fuzzy_ranks_closest_names_first():
+    index = NameIndex(NAMES)
+    matches = index.fuzzy("Kevn Bacon")
+    assert matches[0][0] == "kevin bacon"
+    scores = [score for _, score in matches]
+    assert scores == sorted(scores, reverse=True)
+    assert all(0.4 <= score <= 1 for score in scores)
+    assert index.fuzzy("kevin bacon")[0] == ("kevin bacon", 1.0)
+    assert index.fuzzy("qqqqq") == []
+
+
+def test_search_puts_prefix_matches_before_fuzzy_ones():
+    index = NameIndex(NAMES)
+    assert index.search("Tom Ha")[:2] == ["tom hanks", "tom hardy"]
+    assert index.search("emma waston")[0] == "emma watson"
+    assert len(index.search("kevin", limit=3)) == 3
+
+
+def test_add_and_remove():
+    index = NameIndex(NAMES)
+    index.add("kevin bacon jr")
+    assert index.prefix("kevin bacon") == ["kevin bacon", "kevin bacon jr"]
+    assert "kevin bacon jr" in [name for name, _ in index.fuzzy("kevin bacn jr")]
+
+    index.remove("kevin bacon")
+    assert index.prefix("kevin b") == ["kevin bacon jr"]
+    assert "kevin bacon" not in [name for name, _ in index.fuzzy("kevin bacon")]
+
+    # adding a removed name again finds it under its new position
+    index.add("kevin bacon")
+    assert index.fuzzy("kevin bacon")[0] == ("kevin bacon", 1.0)
+    index.remove("nobody")
+    assert len(index.prefix("")) == len(NAMES) + 1
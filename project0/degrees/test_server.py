@@ -0,0 +1,78 @@
+import json
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+
+SMALL = os.path.join(os.path.dirname(__file__), "small")
+SERVER = os.path.join(os.path.dirname(__file__), "server.py")
+
+# Seconds to wait for the server to start, answer or stop
+TIMEOUT = 30
+
+
+@pytest.fixture
+def server(tmp_path):
+    for filename in ("people.csv", "movies.csv", "stars.csv"):
+        shutil.copy(f"{SMALL}/{filename}", tmp_path)
+    address = str(tmp_path / "degrees.sock")
+
+    # errors go to a file, as a pipe would be held open by the workers
+    errors = tmp_path / "errors.txt"
+    with open(errors, "w") as f:
+        process = subprocess.Popen(
+            [sys.executable, SERVER, str(tmp_path), address, "2"],
+            stdout=subprocess.DEVNULL, stderr=f
+        )
+    deadline = time.monotonic() + TIMEOUT
+    while not os.path.exists(address):
+        assert process.poll() is None, errors.read_text()
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+    yield process, address, errors
+    if process.poll() is None:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout=TIMEOUT)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def exchange(address, requests):
+    """
+    Sends request lines, half-closes the connection and returns
+    the response lines read until the server closes it.
+    """
+    with socket.socket(socket.AF_UNIX) as client:
+        client.settimeout(TIMEOUT)
+        client.connect(address)
+        client.sendall(b"".join(json.dumps(request).encode("utf-8") + b"\n" for request in requests))
+        client.shutdown(socket.SHUT_WR)
+        data = b""
+        while chunk := client.recv(4096):
+            data += chunk
+    return [json.loads(line) for line in data.splitlines()]
+
+
+def test_round_trip_ends_with_eof(server):
+    process, address, errors = server
+    responses = exchange(address, [{"op": "path", "source": "102", "target": "158", "id": 1}])
+    assert responses == [{"source": "102", "target": "158", "degrees": 1, "path": [["112384", "158"]], "id": 1}]
+
+    # a second connection after the workers have started gets its EOF too
+    responses = exchange(address, [{"op": "person", "name": "Kevin Bacon"}, {"op": "stats"}])
+    assert responses[0]["people"] == [{"id": "102", "name": "Kevin Bacon", "birth": "1958"}]
+
+
+def test_sigterm_closes_the_server(server):
+    process, address, errors = server
+    exchange(address, [{"op": "path", "source": "102", "target": "129"}])
+    process.send_signal(signal.SIGTERM)
+    assert process.wait(timeout=TIMEOUT) == 0
+    assert "leaked" not in errors.read_text()
@@ -0,0 +1,55 @@
+import os
+import shutil
+
+import pytest
+
+import degrees
+from snapshot import read_snapshot, snapshot_path
+
+SMALL = os.path.join(os.path.dirname(__file__), "small")
+
+
+@pytest.fixture
+def directory(tmp_path):
+    for filename in ("people.csv", "movies.csv", "stars.csv"):
+        shutil.copy(f"{SMALL}/{filename}", tmp_path)
+    return str(tmp_path)
+
+
+def truncate(size):
+    def damage(data):
+        return data[:size(data)]
+    return damage
+
+
+def overwrite(start, garbage):
+    def damage(data):
+        return data[:start] + garbage + data[start + len(garbage):]
+    return damage
+
+
+@pytest.mark.parametrize("damage", [
+    truncate(lambda data: 0),
+    truncate(lambda data: 20),
+    truncate(lambda data: len(data) - 100),
+    truncate(lambda data: len(data) - 1),
+    overwrite(12, b"{not json"),
+    overwrite(8, b"\xff\xff\xff\x7f"),
+])
+@pytest.mark.parametrize("compact", [False, True])
+def test_damaged_snapshot_falls_back_to_csvs(directory, damage, compact):
+    degrees.load_data(directory, compact=compact, snapshot=True)
+    expected = {person_id: degrees.people[person_id]["name"] for person_id in degrees.people}
+    path = snapshot_path(directory)
+    with open(path, "rb") as f:
+        data = f.read()
+    with open(path, "wb") as f:
+        f.write(damage(data))
+    assert read_snapshot(directory) is None
+
+    degrees.load_data(directory, compact=compact, snapshot=True)
+    assert {person_id: degrees.people[person_id]["name"] for person_id in degrees.people} == expected
+    assert len(degrees.shortest_path("102", "158")) == 1
+
+    # the snapshot is written again from the CSVs
+    assert read_snapshot(directory) is not None
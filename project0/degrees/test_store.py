@@ -0,0 +1,49 @@
+import os
+import shutil
+
+import pytest
+
+import degrees
+
+SMALL = os.path.join(os.path.dirname(__file__), "small")
+
+
+@pytest.fixture
+def directory(tmp_path):
+    for filename in ("people.csv", "movies.csv", "stars.csv"):
+        shutil.copy(f"{SMALL}/{filename}", tmp_path)
+    yield str(tmp_path)
+    degrees.reset_data()
+
+
+@pytest.mark.parametrize("years, allow, deny", [
+    ((1990, 1995), None, None),
+    ((None, 1992), None, None),
+    ((1993, None), None, None),
+    (None, {"112384", "95953", "unknown"}, None),
+    (None, None, {"104257"}),
+    ((1990, 2000), None, {"112384"}),
+])
+def test_movie_filter_matches_dictionaries(directory, years, allow, deny):
+    degrees.load_data(directory)
+    expected = degrees.movie_filter(years, allow, deny)
+    paths = {person_id: degrees.shortest_path("102", person_id, allowed=expected) for person_id in degrees.people}
+
+    degrees.load_data(directory, database=True)
+    allowed = degrees.movie_filter(years, allow, deny)
+    assert set(allowed) == expected
+    assert len(allowed) == len(expected)
+    assert all(movie_id in allowed for movie_id in expected)
+    for person_id, path in paths.items():
+        found = degrees.shortest_path("102", person_id, allowed=allowed)
+        assert (found is None) == (path is None)
+        assert found is None or len(found) == len(path)
+
+
+def test_names_are_searched_in_sql(directory):
+    degrees.load_data(directory, database=True)
+    assert degrees.index_names() is degrees.names
+    assert degrees.names.search("Tom") == ["tom cruise", "tom hanks"]
+    assert degrees.names.search("kevin bacn") == ["kevin bacon"]
+    assert degrees.names.search("tom", limit=1) == ["tom cruise"]
+    assert degrees.names.search("%") == []
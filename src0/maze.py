@@ -1,49 +1,129 @@
+import hashlib
+import mmap
+import os
 import sys
 import subprocess
+from contextlib import nullcontext
 
-class Node():
-    def __init__(self, state, parent, action):
-        self.state = state
-        self.parent = parent
-        self.action = action
+import numpy as np
 
+from util import PriorityFrontier, QueueFrontier, StackFrontier
 
-class StackFrontier():
-    def __init__(self):
-        self.frontier = []
+# Search strategies Maze.solve accepts
+STRATEGIES = ("bfs", "dfs", "greedy", "astar")
 
-    def add(self, node):
-        self.frontier.append(node)
+# Bytes of a maze file scanned at once while loading it
+CHUNK = 1 << 20
 
-    def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
+# Step count of cells an informed search has not reached
+UNREACHED = int(np.iinfo(np.int32).max)
 
-    def empty(self):
-        return len(self.frontier) == 0
-
-    def remove(self):
-        if self.empty():
-            raise Exception("empty frontier")
-        else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
-            return node
+# Colors of output_image, indexed by the cell kinds below
+PALETTE = np.array([
+    (237, 240, 252),
+    (40, 40, 40),
+    (255, 0, 0),
+    (0, 171, 28),
+    (220, 235, 113),
+    (212, 97, 85)
+], dtype=np.uint8)
+EMPTY, WALL, START, GOAL, SOLUTION, EXPLORED = range(6)
 
+# Command output_image(show=True) opens the image with
+VIEWER = ["code", "--reuse-window"]
 
-class QueueFrontier(StackFrontier):
+# Goal fields kept by Maze.goal_field, keyed by the SHA-256 of the maze
+# file, least recently used first
+FIELDS = {}
+FIELD_CACHE = 8
 
-    def remove(self):
-        if self.empty():
-            raise Exception("empty frontier")
-        else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
-            return node
 
 class Maze():
 
     def __init__(self, filename):
 
+        # Read walls, start and goal straight from the mapped file when it is plain ASCII
+        self.filename = filename
+        self.version = _version(filename)
+        if not self._load_mapped(filename):
+            self._load_text(filename)
+        self.walls = self.grid[1:-1, 1:-1]
+        self._index_cells()
+
+        self.solution = None
+        self.digest = None
+
+
+    def _load_mapped(self, filename):
+        """Fills the wall grid from a memory map of the file, without
+        reading it into a string. Returns False, having read nothing,
+        for files with non-ASCII characters or lone carriage returns,
+        which _load_text handles."""
+
+        with open(filename, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                raise Exception("maze must have exactly one start point")
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+
+                # One pass over the bytes, a chunk at a time, finds the line
+                # ends, the start and the goal, and anything needing _load_text
+                newlines = []
+                starts = []
+                goals = []
+                plain = True
+                for offset in range(0, size, CHUNK):
+                    chunk = np.frombuffer(data, dtype=np.uint8, count=min(CHUNK, size - offset), offset=offset)
+                    returns = np.flatnonzero(chunk == ord("\r")) + offset
+                    plain = not (chunk >= 128).any() and all(
+                        position + 1 < size and data[position + 1] == ord("\n") for position in returns.tolist()
+                    )
+                    newlines.append(np.flatnonzero(chunk == ord("\n")) + offset)
+                    starts.extend((np.flatnonzero(chunk == ord("A")) + offset)[:2].tolist())
+                    goals.extend((np.flatnonzero(chunk == ord("B")) + offset)[:2].tolist())
+
+                    # the map cannot be closed while an array still points into it
+                    del chunk
+                    if not plain:
+                        return False
+
+                # Validate start and goal
+                if len(starts) != 1:
+                    raise Exception("maze must have exactly one start point")
+                if len(goals) != 1:
+                    raise Exception("maze must have exactly one goal")
+
+                # Lines run from just after one newline to the next, less any
+                # carriage return, and a last line only counts if it has characters
+                ends = np.concatenate(newlines)
+                if ends.size == 0 or ends[-1] != size - 1:
+                    ends = np.append(ends, size)
+                begins = np.concatenate(([0], ends[:-1] + 1))
+                stops = ends.copy()
+                for i in np.flatnonzero(ends > begins):
+                    if data[ends[i] - 1] == ord("\r"):
+                        stops[i] -= 1
+                lengths = stops - begins
+
+                # Determine height and width of maze
+                self.height = len(begins)
+                self.width = int(lengths.max())
+                self.start = self._locate(starts[0], ends, begins)
+                self.goal = self._locate(goals[0], ends, begins)
+
+                # Keep track of walls, past the end of a short line cells are open
+                self._border()
+                for i, (begin, length) in enumerate(zip(begins.tolist(), lengths.tolist())):
+                    if length:
+                        codes = np.frombuffer(data, dtype=np.uint8, count=length, offset=begin)
+                        self.grid[i + 1, 1:length + 1] = (codes != ord(" ")) & (codes != ord("A")) & (codes != ord("B"))
+                        del codes
+        return True
+
+
+    def _load_text(self, filename):
+        """Fills the wall grid from the decoded text of the file."""
+
         # Read file and set height and width of maze
         with open(filename) as f:
             contents = f.read()
@@ -59,27 +139,54 @@ class Maze():
         self.height = len(contents)
         self.width = max(len(line) for line in contents)
 
-        # Keep track of walls
-        self.walls = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                try:
-                    if contents[i][j] == "A":
-                        self.start = (i, j)
-                        row.append(False)
-                    elif contents[i][j] == "B":
-                        self.goal = (i, j)
-                        row.append(False)
-                    elif contents[i][j] == " ":
-                        row.append(False)
-                    else:
-                        row.append(True)
-                except IndexError:
-                    row.append(False)
-            self.walls.append(row)
+        # Keep track of walls, past the end of a short line cells are open
+        self._border()
+        for i, line in enumerate(contents):
+            codes = np.frombuffer(line.encode("utf-32-le"), dtype=np.uint32)
+            self.grid[i + 1, 1:len(line) + 1] = (codes != ord(" ")) & (codes != ord("A")) & (codes != ord("B"))
+            if "A" in line:
+                self.start = (i, line.index("A"))
+            if "B" in line:
+                self.goal = (i, line.index("B"))
+
+
+    def _border(self):
+        """Creates the open grid with a border of walls all around,
+        so neighbors never need a bounds check."""
+        self.grid = np.zeros((self.height + 2, self.width + 2), dtype=bool)
+        self.grid[0, :] = self.grid[-1, :] = True
+        self.grid[:, 0] = self.grid[:, -1] = True
+
+
+    @staticmethod
+    def _locate(position, ends, begins):
+        """(row, col) of a byte position given the line boundaries."""
+        row = int(np.searchsorted(ends, position))
+        return (row, int(position - begins[row]))
+
+
+    def _index_cells(self):
+        """Sets up flat indexing into the bordered grid: the cell at
+        (row, col) is (row + 1) * stride + col + 1, and its neighbors
+        are that index plus each of the offsets in moves."""
+        self.stride = self.width + 2
+        self.moves = (
+            ("up", -self.stride, (-1, 0)),
+            ("down", self.stride, (1, 0)),
+            ("left", -1, (0, -1)),
+            ("right", 1, (0, 1))
+        )
 
-        self.solution = None
+
+    def cell(self, state):
+        """Flat index of a (row, col) state."""
+        return (state[0] + 1) * self.stride + state[1] + 1
+
+
+    def state(self, cell):
+        """(row, col) state of a flat index."""
+        row, col = divmod(cell, self.stride)
+        return (row - 1, col - 1)
 
 
     def print(self):
@@ -102,132 +209,350 @@ class Maze():
 
 
     def neighbors(self, state):
+        walls = self.grid.reshape(-1)
+        cell = self.cell(state)
         row, col = state
-        candidates = [
-            ("up", (row - 1, col)),
-            ("down", (row + 1, col)),
-            ("left", (row, col - 1)),
-            ("right", (row, col + 1))
+        return [
+            (action, (row + dr, col + dc))
+            for action, offset, (dr, dc) in self.moves
+            if not walls[cell + offset]
         ]
 
-        result = []
-        for action, (r, c) in candidates:
-            if 0 <= r < self.height and 0 <= c < self.width and not self.walls[r][c]:
-                result.append((action, (r, c)))
-        return result
 
+    def solve(self, strategy="bfs", stats=None):
+        """Finds a solution to maze, if one exists.
 
-    def solve(self):
-        """Finds a solution to maze, if one exists."""
+        strategy is one of STRATEGIES: breadth first, depth first,
+        greedy best-first or A* search, the last two guided by the
+        Manhattan distance to the goal. stats is an optional object
+        to count the search in, with the counted, frontier, phase and
+        done methods of the SearchStats in project0/degrees."""
+
+        if strategy not in STRATEGIES:
+            raise ValueError(f"unknown strategy {strategy!r}, expected one of {', '.join(STRATEGIES)}")
+
+        try:
+            with nullcontext() if stats is None else stats.phase("search"):
+                self._search(strategy, stats)
+        finally:
+            if stats is not None:
+                stats.done()
+
+
+    def distance(self, state):
+        """Manhattan distance from state to the goal."""
+        return abs(state[0] - self.goal[0]) + abs(state[1] - self.goal[1])
+
+
+    def _search(self, strategy, stats):
 
         # Keep track of number of states explored
         self.num_explored = 0
 
+        # Walls, and which cells were explored, as flat arrays over the bordered grid
+        walls = memoryview(self.grid.reshape(-1))
+        explored = bytearray(self.grid.size)
+
+        # Move (index into self.moves, plus one) that first reached every cell, 0 if none
+        reached_by = bytearray(self.grid.size)
+        moves = [(action, offset) for action, offset, _ in self.moves]
+
+        def expand(cell):
+            return [
+                (move, cell + offset)
+                for move, (_, offset) in enumerate(moves, 1)
+                if not walls[cell + offset]
+            ]
+
+        # Count every expansion when collecting stats
+        if stats is not None:
+            expand = stats.counted(expand)
+
         # Initialize frontier to just the starting position
-        start = Node(state=self.start, parent=None, action=None)
-        frontier = QueueFrontier()
-        #frontier = StackFrontier()
-        frontier.add(start)
+        start = self.cell(self.start)
+        goal = self.cell(self.goal)
+        informed = strategy in ("greedy", "astar")
+        # reached_by already records which cells were added
+        if strategy == "bfs":
+            frontier = QueueFrontier(track_states=False)
+        elif strategy == "dfs":
+            frontier = StackFrontier(track_states=False)
+        else:
+            frontier = PriorityFrontier()
+        if informed:
+            frontier.add(start, self._priority(strategy, self.start, 0))
+        else:
+            frontier.add(start)
 
-        # Initialize an empty explored set
-        self.explored = set()
+        # Number of cells ever added to the frontier, and for informed
+        # searches the number of steps to reach each of them, UNREACHED if none
+        seen = 1
+        if informed:
+            costs = np.full(self.grid.size, UNREACHED, dtype=np.int32)
+            costs[start] = 0
+            costs = memoryview(costs)
 
         # Keep looping until solution found
         while True:
 
+            if stats is not None:
+                stats.frontier(len(frontier))
+                stats.reached = seen - 1
+
             # If nothing left in frontier, then no path
             if frontier.empty():
+                self.explored = self._explored_grid(explored)
                 raise Exception("no solution")
 
-            # Choose a node from the frontier
-            node = frontier.remove()
+            # Choose a cell from the frontier
+            cell = frontier.remove()
             self.num_explored += 1
 
-            # If node is the goal, then we have a solution
-            if node.state == self.goal:
+            # If cell is the goal, then we have a solution
+            if cell == goal:
                 actions = []
                 cells = []
-                while node.parent is not None:
-                    actions.append(node.action)
-                    cells.append(node.state)
-                    node = node.parent
+                while cell != start:
+                    action, offset = moves[reached_by[cell] - 1]
+                    actions.append(action)
+                    cells.append(self.state(cell))
+                    cell -= offset
                 actions.reverse()
                 cells.reverse()
                 self.solution = (actions, cells)
+                self.explored = self._explored_grid(explored)
                 return
 
-            # Mark node as explored
-            self.explored.add(node.state)
-
-            # Add neighbors to frontier
-            for action, state in self.neighbors(node.state):
-                if not frontier.contains_state(state) and state not in self.explored:
-                    child = Node(state=state, parent=node, action=action)
-                    frontier.add(child)
-
-
-    def output_image(self, filename, show_solution=True, show_explored=False):
-        from PIL import Image, ImageDraw
-        cell_size = 50
-        cell_border = 2
-
-        # Create a blank canvas
-        img = Image.new(
-            "RGBA",
-            (self.width * cell_size, self.height * cell_size),
-            "black"
-        )
-        draw = ImageDraw.Draw(img)
-
-        solution = self.solution[1] if self.solution is not None else None
-        for i, row in enumerate(self.walls):
-            for j, col in enumerate(row):
-
-                # Walls
-                if col:
-                    fill = (40, 40, 40)
-
-                # Start
-                elif (i, j) == self.start:
-                    fill = (255, 0, 0)
-
-                # Goal
-                elif (i, j) == self.goal:
-                    fill = (0, 171, 28)
-
-                # Solution
-                elif solution is not None and show_solution and (i, j) in solution:
-                    fill = (220, 235, 113)
+            # Mark cell as explored
+            explored[cell] = 1
+
+            # Add neighbors not yet seen to frontier
+            if not informed:
+                for move, neighbor in expand(cell):
+                    if not reached_by[neighbor] and neighbor != start:
+                        reached_by[neighbor] = move
+                        seen += 1
+                        frontier.add(neighbor)
+                continue
+
+            # Add or move up neighbors reached in fewer steps than before
+            cost = costs[cell] + 1
+            for move, neighbor in expand(cell):
+                if explored[neighbor] or costs[neighbor] <= cost:
+                    continue
+                if costs[neighbor] == UNREACHED:
+                    seen += 1
+                costs[neighbor] = cost
+                reached_by[neighbor] = move
+                frontier.add(neighbor, self._priority(strategy, self.state(neighbor), cost))
+
+
+    def _explored_grid(self, explored):
+        """Boolean (height, width) view of a flat explored bytearray."""
+        grid = np.frombuffer(explored, dtype=bool).reshape(self.grid.shape)
+        return grid[1:-1, 1:-1]
+
+
+    def goal_field(self):
+        """GoalField of this maze, built on first use and then shared
+        by every Maze loaded from a file with the same contents.
+
+        The file is hashed on the first call, not while loading, so
+        mazes that never ask for a field do not pay for it. If it has
+        changed since, the hash is not of this maze and the field is
+        built without being cached."""
+        if self.digest is None:
+            if _version(self.filename) != self.version:
+                return GoalField(self)
+            with open(self.filename, "rb") as f:
+                self.digest = hashlib.file_digest(f, "sha256").hexdigest()
+
+        # Move a hit to the end, so the least recently used field goes first
+        field = FIELDS.pop(self.digest, None)
+        if field is None:
+            field = GoalField(self)
+            if len(FIELDS) >= FIELD_CACHE:
+                del FIELDS[next(iter(FIELDS))]
+        FIELDS[self.digest] = field
+        return field
+
+
+    def _priority(self, strategy, state, cost):
+        """Frontier priority of a state reached in cost steps."""
+        if strategy == "greedy":
+            return self.distance(state)
+
+        # break ties between equal estimates in favour of states nearer the goal
+        return (cost + self.distance(state), self.distance(state))
+
+
+    def output_image(self, filename, show_solution=True, show_explored=False,
+                     cell_size=50, cell_border=2, show=False):
+        """Saves the maze as an image, built as one array instead of
+        a rectangle per cell. If show is True, the image is opened
+        with VIEWER afterwards."""
+        from PIL import Image
+
+        # Color of every cell, later steps painting over earlier ones
+        colors = np.full((self.height, self.width), EMPTY, dtype=np.uint8)
+        if self.solution is not None:
+
+            # Explored
+            if show_explored:
+                colors[self.explored] = EXPLORED
+
+            # Solution
+            if show_solution and self.solution[1]:
+                rows, cols = np.array(self.solution[1]).T
+                colors[rows, cols] = SOLUTION
+
+        # Start, goal and walls
+        colors[self.start] = START
+        colors[self.goal] = GOAL
+        colors[self.walls] = WALL
+
+        # Every cell is a square of its color inside a black border
+        inside = np.zeros(cell_size, dtype=bool)
+        inside[cell_border:cell_size - cell_border + 1] = True
+        square = (inside[:, None] & inside[None, :])[None, :, None, :, None]
+        cells = PALETTE[colors][:, None, :, None, :]
+        raster = (cells * square).reshape(self.height * cell_size, self.width * cell_size, 3)
+
+        Image.fromarray(raster, "RGB").save(filename)
+        if show:
+            subprocess.run(VIEWER + [filename])
+
+
+class GoalField():
+    """Breadth first distances from every open cell to the goal of
+    a maze, with the move that leads one step closer from each.
+
+    Built once, it answers the path from any start in O(path length)
+    without searching, so many agents headed for the same goal share
+    a single search instead of running one each."""
+
+    def __init__(self, maze):
+        self.height = maze.height
+        self.width = maze.width
+        self.goal = maze.goal
+        self.stride = maze.stride
+        self.moves = maze.moves
+
+        # Steps to the goal of every cell of the bordered grid, -1 if it cannot reach it
+        walls = maze.grid.reshape(-1)
+        self.steps = np.full(maze.grid.size, -1, dtype=np.int32)
+
+        # Move (index into moves, plus one) toward the goal from every cell, 0 if none
+        self.toward = np.zeros(maze.grid.size, dtype=np.uint8)
+        offsets = [offset for _, offset, _ in self.moves]
+        back = np.array([offsets.index(-offset) + 1 for offset in offsets], dtype=np.uint8)
+
+        # Expand a whole level of the search at a time
+        frontier = np.array([maze.cell(self.goal)])
+        self.steps[frontier] = 0
+        level = 0
+        while frontier.size:
+            level += 1
+            cells = []
+            moves = []
+            for move, offset in enumerate(offsets):
+                neighbors = frontier + offset
+                neighbors = neighbors[~walls[neighbors] & (self.steps[neighbors] < 0)]
+                cells.append(neighbors)
+                moves.append(np.full(neighbors.size, move))
+
+            # A cell reached from several others keeps the first move found
+            frontier, first = np.unique(np.concatenate(cells), return_index=True)
+            self.steps[frontier] = level
+            self.toward[frontier] = back[np.concatenate(moves)[first]]
+
+
+    def cells(self, states):
+        """Flat indexes of an array of (row, col) states."""
+        states = np.asarray(states, dtype=np.intp).reshape(-1, 2)
+        rows, cols = states[:, 0], states[:, 1]
+        if ((rows < 0) | (rows >= self.height) | (cols < 0) | (cols >= self.width)).any():
+            raise ValueError("state outside the maze")
+        return (rows + 1) * self.stride + cols + 1
+
+
+    def distance(self, state):
+        """Steps from state to the goal, or None if there is no path."""
+        steps = int(self.steps[self.cells([state])[0]])
+        return steps if steps >= 0 else None
+
+
+    def distances(self, states):
+        """Array of the steps to the goal from each of states, -1
+        where there is no path."""
+        return self.steps[self.cells(states)]
+
+
+    def path(self, state):
+        """(actions, cells) from state to the goal, in the form of
+        Maze.solution, following the field one step at a time."""
+        cell = int(self.cells([state])[0])
+        steps = int(self.steps[cell])
+        if steps < 0:
+            raise Exception("no solution")
+
+        actions = []
+        cells = []
+        toward = memoryview(self.toward)
+        for _ in range(steps):
+            action, offset, _ = self.moves[toward[cell] - 1]
+            cell += offset
+            actions.append(action)
+            cells.append(divmod(cell, self.stride))
+        return (actions, [(row - 1, col - 1) for row, col in cells])
+
+
+    def paths(self, states):
+        """List of the path from each of states, None for those
+        with no path to the goal."""
+        states = np.asarray(states, dtype=np.intp).reshape(-1, 2)
+        reachable = self.distances(states) >= 0
+        return [
+            self.path(state) if ok else None
+            for state, ok in zip(map(tuple, states.tolist()), reachable.tolist())
+        ]
 
-                # Explored
-                elif solution is not None and show_explored and (i, j) in self.explored:
-                    fill = (212, 97, 85)
 
-                # Empty cell
-                else:
-                    fill = (237, 240, 252)
-
-                # Draw cell
-                draw.rectangle(
-                    ([(j * cell_size + cell_border, i * cell_size + cell_border),
-                      ((j + 1) * cell_size - cell_border, (i + 1) * cell_size - cell_border)]),
-                    fill=fill
-                )
-
-        code_path = "/mnt/c/Users/Migue/AppData/Local/Programs/Microsoft VS Code/Code.exe"
-        img.save(filename)
-        subprocess.run(["code", "--reuse-window", filename])
-
-
-if len(sys.argv) != 2:
-    sys.exit("Usage: python maze.py maze.txt")
-
-m = Maze(sys.argv[1])
-print("Maze:")
-m.print()
-print("Solving...")
-m.solve()
-print("States Explored:", m.num_explored)
-print("Solution:")
-m.print()
-m.output_image("maze.png", show_explored=True)
+def _version(filename):
+    """Size and modification time of a file, to tell if it changed."""
+    stat = os.stat(filename)
+    return (stat.st_size, stat.st_mtime_ns)
+
+
+def compare_strategies(filename):
+    """Solves the maze in filename with every strategy and returns
+    a dict mapping each strategy to its (num_explored, solution length)."""
+    results = {}
+    for strategy in STRATEGIES:
+        m = Maze(filename)
+        m.solve(strategy)
+        results[strategy] = (m.num_explored, len(m.solution[0]))
+    return results
+
+
+if __name__ == "__main__":
+    show = "--show" in sys.argv
+    args = [arg for arg in sys.argv[1:] if arg != "--show"]
+    if len(args) not in (1, 2):
+        sys.exit(f"Usage: python maze.py maze.txt [{' | '.join(STRATEGIES)} | all] [--show]")
+    strategy = args[1] if len(args) == 2 else "bfs"
+
+    if strategy == "all":
+        for strategy, (explored, length) in compare_strategies(args[0]).items():
+            print(f"{strategy}: {explored} states explored, solution of {length} steps")
+        sys.exit()
+
+    m = Maze(args[0])
+    print("Maze:")
+    m.print()
+    print("Solving...")
+    m.solve(strategy)
+    print("States Explored:", m.num_explored)
+    print("Solution:")
+    m.print()
+    m.output_image("maze.png", show_explored=True, show=show)
@@ -0,0 +1,145 @@
+import os
+
+import numpy as np
+import pytest
+
+from maze import STRATEGIES, GoalField, Maze
+from util import PriorityFrontier, QueueFrontier, StackFrontier
+
+MAZES = os.path.dirname(__file__)
+
+# num_explored and solution length of every strategy on the example mazes
+EXPLORED = {
+    "maze1.txt": {"bfs": (11, 10), "dfs": (11, 10), "greedy": (11, 10), "astar": (11, 10)},
+    "maze2.txt": {"bfs": (77, 30), "dfs": (194, 30), "greedy": (54, 30), "astar": (50, 30)},
+    "maze3.txt": {"bfs": (6, 4), "dfs": (17, 16), "greedy": (5, 4), "astar": (5, 4)},
+}
+
+TEXT = "##B#\n#  #\n# ##\nA  #\n"
+
+# Maze with open cells walled off from the goal
+POCKET = "A   #  \n### # #\n  # # B\n  #   #\n"
+
+
+def write(tmp_path, data, name="maze.txt"):
+    path = tmp_path / name
+    path.write_bytes(data if isinstance(data, bytes) else data.encode("utf-8"))
+    return str(path)
+
+
+def check_solution(maze):
+    """
+    Asserts that the solution of maze is a walk of legal moves from start to goal.
+    """
+    actions, cells = maze.solution
+    state = maze.start
+    for action, cell in zip(actions, cells):
+        assert dict(maze.neighbors(state))[action] == cell
+        state = cell
+    assert state == maze.goal
+
+
+@pytest.mark.parametrize("filename", sorted(EXPLORED))
+@pytest.mark.parametrize("strategy", STRATEGIES)
+def test_num_explored_per_strategy(filename, strategy):
+    maze = Maze(os.path.join(MAZES, filename))
+    maze.solve(strategy)
+    assert (maze.num_explored, len(maze.solution[0])) == EXPLORED[filename][strategy]
+    assert int(maze.explored.sum()) == maze.num_explored - 1
+    check_solution(maze)
+
+
+def test_unknown_strategy():
+    with pytest.raises(ValueError):
+        Maze(os.path.join(MAZES, "maze1.txt")).solve("random")
+
+
+@pytest.mark.parametrize("data", [
+    TEXT.replace("\n", "\r\n"),
+    TEXT.rstrip("\n"),
+    TEXT.replace("#", "█"),
+    TEXT.replace("#", "█").replace("\n", "\r\n"),
+])
+def test_line_endings_and_non_ascii_walls(tmp_path, data):
+    expected = Maze(write(tmp_path, TEXT, "expected.txt"))
+    maze = Maze(write(tmp_path, data))
+    assert (maze.height, maze.width) == (4, 4)
+    assert (maze.start, maze.goal) == ((3, 0), (0, 2))
+    assert np.array_equal(maze.walls, expected.walls)
+    maze.solve("astar")
+    assert maze.solution == (["right", "up", "up", "right", "up"], [(3, 1), (2, 1), (1, 1), (1, 2), (0, 2)])
+
+
+def test_ragged_and_blank_lines_are_open(tmp_path):
+    maze = Maze(write(tmp_path, "#####\n#A\n\n#  B#\n#####\n"))
+    assert (maze.height, maze.width) == (5, 5)
+    assert maze.walls[1].tolist() == [True, False, False, False, False]
+    assert not maze.walls[2].any()
+    assert maze.goal == (3, 3)
+    maze.solve("bfs")
+    assert len(maze.solution[0]) == 4
+
+
+def test_start_and_goal_are_required(tmp_path):
+    with pytest.raises(Exception, match="start"):
+        Maze(write(tmp_path, "#  B\n"))
+    with pytest.raises(Exception, match="goal"):
+        Maze(write(tmp_path, "A  B\nB\n"))
+
+
+@pytest.mark.parametrize("text", [None, POCKET])
+def test_goal_field_paths_match_solve(tmp_path, text):
+    filename = os.path.join(MAZES, "maze2.txt") if text is None else write(tmp_path, text)
+    field = GoalField(Maze(filename))
+    for row, col in np.argwhere(~Maze(filename).walls).tolist():
+        maze = Maze(filename)
+        if (row, col) == maze.goal:
+            assert field.path((row, col)) == ([], [])
+            continue
+        maze.start = (row, col)
+        try:
+            maze.solve("bfs")
+        except Exception:
+            assert field.distance(maze.start) is None
+            with pytest.raises(Exception, match="no solution"):
+                field.path(maze.start)
+            continue
+        path = field.path(maze.start)
+        assert len(path[0]) == len(maze.solution[0]) == field.distance(maze.start)
+        maze.solution = path
+        check_solution(maze)
+
+
+def test_priority_frontier_decrease_key():
+    frontier = PriorityFrontier()
+    assert frontier.add("a", 5)
+    assert frontier.add("b", 3)
+    assert frontier.add("c", 3)
+
+    # a lower priority replaces the entry, a higher one is ignored
+    assert frontier.add("a", 1)
+    assert not frontier.add("b", 4)
+    assert not frontier.add("a", 1)
+    assert len(frontier) == 3
+    assert frontier.priority("a") == 1
+    assert frontier.contains_state("b")
+
+    # equal priorities come out oldest first, and the replaced entry never does
+    assert [frontier.remove() for _ in range(3)] == ["a", "b", "c"]
+    assert frontier.empty()
+    assert frontier.priority("a") is None
+    with pytest.raises(Exception, match="empty frontier"):
+        frontier.remove()
+
+
+@pytest.mark.parametrize("track_states", [True, False])
+def test_stack_and_queue_frontiers(track_states):
+    stack = StackFrontier(track_states)
+    queue = QueueFrontier(track_states)
+    for frontier in (stack, queue):
+        for state in ("a", "b", "a"):
+            frontier.add(state)
+    assert [stack.remove() for _ in range(2)] == ["a", "b"]
+    assert [queue.remove() for _ in range(2)] == ["a", "b"]
+    assert stack.contains_state("a") and queue.contains_state("a")
+    assert not stack.contains_state("b") and not queue.contains_state("b")
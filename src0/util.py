@@ -0,0 +1,124 @@
+import heapq
+from collections import deque
+from itertools import count
+
+
+class StackFrontier():
+    """
+    Last in, first out frontier of states.
+
+    The number of times each state is in the frontier is kept in a
+    dictionary, so every operation is O(1). Searches that keep their
+    own record of reached states can pass track_states=False to skip
+    it, leaving contains_state to scan the frontier.
+    """
+
+    def __init__(self, track_states=True):
+        self.frontier = deque()
+        self.states = {} if track_states else None
+
+    def add(self, state):
+        self.frontier.append(state)
+        if self.states is not None:
+            self.states[state] = self.states.get(state, 0) + 1
+
+    def contains_state(self, state):
+        if self.states is None:
+            return state in self.frontier
+        return state in self.states
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def __len__(self):
+        return len(self.frontier)
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            state = self._pop()
+            if self.states is not None:
+                self._forget(state)
+            return state
+
+    def _pop(self):
+        return self.frontier.pop()
+
+    def _forget(self, state):
+        if self.states[state] == 1:
+            del self.states[state]
+        else:
+            self.states[state] -= 1
+
+    def __repr__(self):
+        return f"Frontier({list(self.frontier)})"
+
+
+class QueueFrontier(StackFrontier):
+    """
+    First in, first out frontier of states.
+    """
+
+    def _pop(self):
+        return self.frontier.popleft()
+
+
+class PriorityFrontier():
+    """
+    Frontier that removes the state with the lowest priority first,
+    oldest first among equal priorities.
+
+    Holds each state at most once: adding it again with a lower
+    priority replaces it (decrease-key) and with a higher one is ignored.
+    Replaced heap entries are marked dead and skipped when popped, so
+    add and remove are O(log n) and contains_state is O(1).
+    """
+
+    def __init__(self):
+        self.frontier = []
+        self.entries = {}
+        self.counter = count()
+
+    def add(self, state, priority):
+        """
+        Adds state with a priority, returning False if it is
+        already in the frontier with a priority at least as low.
+        """
+        entry = self.entries.get(state)
+        if entry is not None:
+            if entry[0] <= priority:
+                return False
+            # mark the old entry dead instead of searching the heap for it
+            entry[3] = False
+        entry = [priority, next(self.counter), state, True]
+        self.entries[state] = entry
+        heapq.heappush(self.frontier, entry)
+        return True
+
+    def contains_state(self, state):
+        return state in self.entries
+
+    def priority(self, state):
+        """
+        Returns the priority of state, or None if it is not in the frontier.
+        """
+        entry = self.entries.get(state)
+        return None if entry is None else entry[0]
+
+    def empty(self):
+        return len(self.entries) == 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def remove(self):
+        while self.frontier:
+            _, _, state, alive = heapq.heappop(self.frontier)
+            if alive:
+                del self.entries[state]
+                return state
+        raise Exception("empty frontier")
+
+    def __repr__(self):
+        return f"Frontier({[entry[2] for entry in sorted(self.frontier) if entry[3]]})"